@@ -1,16 +1,49 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
-from .core import init_db, close_db
+from .core import engine, init_db, close_db
+from .core import metrics, profiling
+from .core.compression import CompressionMiddleware
+from .core.migrations import run_migrations
+from .core.maintenance import maintenance_task
+from .core.write_batcher import write_batcher
+from .core.totp_stream import totp_broadcaster
+from .core.key_rotation import key_rotation_job
+from .core.fingerprints import fingerprint_backfill_job
+from .core.config import settings
+from .core.hashing import hashing_service, HashingQueueFull
+from .core.admission import AdmissionRejected, auth_admission
+from .core.breaches import breach_checker
+from .core.tokens import denylist_sync
 from .api.v1.routers import api_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await init_db()
+    if settings.DATABASE_SETUP_ON_STARTUP:
+        await init_db()
+        await run_migrations()
+    hashing_service.start()
+    breach_checker.start()
+    maintenance_task.start()
+    write_batcher.start()
+    denylist_sync.start()
+    if settings.KEY_ROTATION_ON_STARTUP:
+        key_rotation_job.start()
+    if settings.FINGERPRINT_BACKFILL_ON_STARTUP:
+        fingerprint_backfill_job.start()
     yield
     # Shutdown
+    await fingerprint_backfill_job.shutdown()
+    await key_rotation_job.shutdown()
+    await totp_broadcaster.shutdown()
+    await denylist_sync.shutdown()
+    await write_batcher.shutdown()
+    await maintenance_task.shutdown()
+    hashing_service.shutdown()
+    breach_checker.shutdown()
     await close_db()
 
 
@@ -28,12 +61,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag"],
 )
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
 
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
 
+@app.exception_handler(HashingQueueFull)
+async def hashing_queue_full_handler(request: Request, exc: HashingQueueFull):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, try again later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/")
 async def root():
     return {"message": "Password Manager API", "version": "1.0.0"}
@@ -42,3 +100,26 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@metrics.collector
+def _collect_service_metrics():
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        metrics.db_pool.set(pool.checkedout(), "checked_out")
+        metrics.db_pool.set(pool.size(), "size")
+        metrics.db_pool.set(max(pool.overflow(), 0), "overflow")
+    metrics.service_gauge.set(hashing_service.in_flight, "hashing")
+    metrics.admission_state.set(auth_admission.active, "auth", "active")
+    metrics.admission_state.set(auth_admission.queued, "auth", "queued")
+    metrics.service_gauge.set(write_batcher.pending, "write_batcher")
+    metrics.totp_subscribers.set(totp_broadcaster.subscriber_count)
+
+
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        return PlainTextResponse(
+            metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -1,6 +1,13 @@
 from typing import AsyncGenerator
+from fastapi import Depends, HTTPException, Query, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.core import AsyncSessionLocal
+from backend.core.admission import auth_admission
+from backend.core.tokens import InvalidToken, decode_access_token
+from backend.crud import user as user_crud
+
+bearer_scheme = HTTPBearer(auto_error=False)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -9,3 +16,46 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+async def admit_auth(request: Request) -> AsyncGenerator[None, None]:
+    """Hold an auth admission slot for the duration of the request"""
+    client = request.client.host if request.client else "unknown"
+    async with auth_admission.slot(client):
+        yield
+
+
+def unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect secret or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_token_user_id(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> int | None:
+    """User id from a bearer access token, verified without touching the DB"""
+    if credentials is None:
+        return None
+    try:
+        payload = decode_access_token(credentials.credentials)
+    except InvalidToken:
+        raise unauthorized()
+    return int(payload["sub"])
+
+
+async def get_current_user_id(
+    token_user_id: int | None = Depends(get_token_user_id),
+    secret: str | None = Query(None, description="User secret (legacy auth)"),
+    db: AsyncSession = Depends(get_db),
+) -> int:
+    """Bearer token first; fall back to the legacy secret lookup"""
+    if token_user_id is not None:
+        return token_user_id
+    if secret:
+        user = await user_crud.authenticate_user_secret(db, secret)
+        if user:
+            return user.id
+    raise unauthorized()
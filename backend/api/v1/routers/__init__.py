@@ -1,9 +1,10 @@
 from fastapi import APIRouter
-from . import auth, passwords
+from . import auth, logos, passwords
 
 api_router = APIRouter()
 api_router.include_router(auth.auth_router)
 api_router.include_router(passwords.password_router)
+api_router.include_router(logos.logo_router)
 # api_router.include_router(users.)
 
 __all__ = ["api_router"]
@@ -1,23 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.api.v1.deps import get_db
+from backend.api.v1.deps import admit_auth, get_db, bearer_scheme, unauthorized
+from backend.core.config import settings
+from backend.core.profiling import ProfiledRoute
+from backend.core.tokens import InvalidToken, create_access_token, revoke_access_token
 from backend.schemas import user as user_schema
 from backend.crud import user as user_crud
 
 auth_router = APIRouter(
     prefix="/auth",
     tags=["Authentication"],
+    route_class=ProfiledRoute,
 )
 
 
-@auth_router.post("", response_model=user_schema.User)
+@auth_router.post(
+    "", response_model=user_schema.UserToken, dependencies=[Depends(admit_auth)]
+)
 async def login(
     credentials: user_schema.UserLogin,
     db: AsyncSession = Depends(get_db),
 ):
-    """Log user in"""
+    """Log user in and issue a short-lived access token"""
     user = await user_crud.authenticate_user(
         db, credentials.email, credentials.password
     )
@@ -26,17 +33,32 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect secret or password",
         )
-    return user
+    expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    return {
+        **user_schema.User.model_validate(user).model_dump(),
+        "access_token": create_access_token(user.id, expires_in),
+        "expires_in": expires_in,
+    }
 
 
-@auth_router.post("/logout")
-async def logout(): ...
+@auth_router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+):
+    """Revoke the presented access token"""
+    if credentials is None:
+        raise unauthorized()
+    try:
+        await revoke_access_token(credentials.credentials)
+    except InvalidToken:
+        raise unauthorized()
 
 
 @auth_router.post(
     "/register",
     response_model=user_schema.UserResponse,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admit_auth)],
 )
 async def create_user(user: user_schema.UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user with secret and master password"""
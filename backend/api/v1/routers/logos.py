@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
+
+from backend.core.config import settings
+from backend.core.logos import InvalidLogo, logo_store
+from backend.core.profiling import ProfiledRoute
+from backend.schemas import logo as logo_schema
+from ..deps import get_current_user_id
+
+logo_router = APIRouter(prefix="/logos", tags=["Logos"], route_class=ProfiledRoute)
+
+# The URL names the content, so it can never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@logo_router.post(
+    "", response_model=logo_schema.LogoResponse, status_code=status.HTTP_201_CREATED
+)
+async def upload_logo(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+):
+    """Store a logo (the raw image as the request body) and return its hash
+
+    Uploading the same image again returns the same hash without storing a
+    copy. Put the hash in an entry's ``logo`` field.
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.LOGO_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail=f"Logos are limited to {settings.LOGO_MAX_BYTES} bytes",
+            )
+    try:
+        digest = await logo_store.save(bytes(body))
+    except InvalidLogo as exc:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc)
+        )
+    return {
+        "hash": digest,
+        "url": request.url_for("get_logo", digest=digest).path,
+        "sizes": logo_store.variant_sizes,
+    }
+
+
+@logo_router.get("/{digest}")
+async def get_logo(
+    digest: str,
+    size: int | None = Query(None, ge=1, le=1024, description="Smallest acceptable size in pixels"),
+    if_none_match: str | None = Header(None),
+):
+    """Logo by hash; safe to cache forever"""
+    found = logo_store.find(digest, size)
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Logo not found")
+    path, media_type = found
+
+    etag = f'"{path.stem}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "X-Content-Type-Options": "nosniff",
+    }
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # Sent with sendfile-style zero-copy where the server supports pathsend
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -1,43 +1,380 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core import AsyncSessionLocal, export, importers, serialization, totp
+from backend.core.breaches import breach_checker
+from backend.core.security import fingerprint_key_id
+from backend.core.config import settings
+from backend.core.profiling import ProfiledRoute
+from backend.core.totp import totp_cache
+from backend.core.totp_stream import Subscription, TooManySubscribers, totp_broadcaster
 from backend.schemas import password as password_schema
 from backend.schemas import user as user_schema
 from backend.crud import password as password_crud
 from backend.crud import user as user_crud
-from ..deps import get_db
+from ..deps import get_db, get_current_user_id, get_token_user_id, unauthorized
 
-import pyotp
+import asyncio
+import os
 import time
 from datetime import datetime
+from typing import AsyncIterator
 
-password_router = APIRouter(prefix="/passwords", tags=["Passwords"])
+password_router = APIRouter(
+    prefix="/passwords", tags=["Passwords"], route_class=ProfiledRoute
+)
+
+NDJSON_MEDIA_TYPE = serialization.NDJSON_MEDIA_TYPE
+
+# Responses may be cached but must be revalidated with If-None-Match
+VAULT_CACHE_CONTROL = "private, no-cache"
+
+
+def _vault_etag(user_id: int, version: int, *variant) -> str:
+    """Strong ETag for a representation of the vault at ``version``"""
+    return '"' + ".".join(str(part) for part in (user_id, version, *variant)) + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": VAULT_CACHE_CONTROL},
+    )
+
+
+async def _stream_vault(user_id: int, after_id: int | None) -> AsyncIterator[bytes]:
+    # Own session: the request-scoped one may be closed while we still stream
+    async with AsyncSessionLocal() as db:
+        async for pwd in password_crud.stream_user_passwords(db, user_id, after_id):
+            yield serialization.ndjson_line(password_crud.decrypt_password_for_response(pwd))
 
 
 @password_router.post("/get-all", response_model=list[password_schema.PasswordResponse])
 async def get_user_passwords(
-    data: user_schema.GetUserBySecret, db: AsyncSession = Depends(get_db)
+    data: user_schema.GetUserBySecret | None = None,
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size"),
+    after: str | None = Query(None, description="Cursor from X-Next-Cursor"),
+    stream: bool = Query(False, description="Stream entries as NDJSON"),
+    accept: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+    user_id: int | None = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Get all passwords for a user (requires authentication)"""
-    # Authenticate user
-    user = await user_crud.authenticate_user_secret(db, data.secret)
-    if not user:
+    """Get all passwords for a user (requires authentication)
+
+    Pass ``limit`` to page through the vault; the next page's cursor comes
+    back in ``X-Next-Cursor``. Ask for ``application/x-ndjson`` (or
+    ``stream=true``) to receive entries one per line as they are decrypted,
+    or ``application/msgpack`` for MessagePack. Send the ``ETag`` back in ``If-None-Match`` to get ``304`` while the
+    vault is unchanged.
+    """
+    # Authenticate user: bearer token, or the legacy secret in the body
+    if user_id is None:
+        user = await user_crud.authenticate_user_secret(db, data.secret) if data else None
+        if not user:
+            raise unauthorized()
+        user_id = user.id
+
+    try:
+        after_id = password_crud.decode_cursor(after) if after else None
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect secret or password",
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    media_type = NDJSON_MEDIA_TYPE if stream else serialization.negotiate(accept)
+    version = await password_crud.get_vault_version(db, user_id)
+    # Streaming ignores limit, so it must not vary the validator either
+    page_size = "" if media_type == NDJSON_MEDIA_TYPE else limit or ""
+    etag = _vault_etag(
+        user_id, version, "all", page_size, after or "", media_type.rsplit("/", 1)[1]
+    )
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    headers = {"ETag": etag, "Cache-Control": VAULT_CACHE_CONTROL, "Vary": "Accept"}
+    if media_type == NDJSON_MEDIA_TYPE:
+        return StreamingResponse(
+            _stream_vault(user_id, after_id), media_type=NDJSON_MEDIA_TYPE, headers=headers
         )
 
     # Get passwords and decrypt them
-    passwords = await password_crud.get_user_passwords(db, user_id=user.id)
+    passwords = await password_crud.get_user_passwords(
+        db, user_id=user_id, limit=limit, after_id=after_id
+    )
 
-    if not passwords:
-        return []
+    if limit is not None and len(passwords) == limit:
+        headers["X-Next-Cursor"] = password_crud.encode_cursor(passwords[-1].id)
 
-    # Decrypt passwords for response
+    # Already shaped like PasswordResponse: encode directly, skipping validation
     decrypted_passwords = [
         password_crud.decrypt_password_for_response(pwd) for pwd in passwords
     ]
+    return serialization.encoded_response(decrypted_passwords, media_type, headers=headers)
+
+
+async def _stream_export(user_id: int, passphrase: str) -> AsyncIterator[bytes]:
+    salt = os.urandom(16)
+    writer = export.ExportWriter(salt)
+    yield writer.header
+    writer.set_key(await asyncio.to_thread(export.derive_export_key, passphrase, salt))
+
+    async with AsyncSessionLocal() as db:
+        async for pwd in password_crud.stream_user_passwords(db, user_id):
+            frames = writer.write(
+                serialization.ndjson_line(password_crud.decrypt_password_for_response(pwd))
+            )
+            if frames:
+                yield frames
+    yield writer.finish()
+
+
+@password_router.get("/export")
+async def export_passwords(
+    passphrase: str = Header(
+        ..., alias="X-Export-Passphrase", min_length=8,
+        description="Passphrase the archive is encrypted with",
+    ),
+    user_id: int = Depends(get_current_user_id),
+):
+    """Stream the vault as an encrypted, gzip-compressed NDJSON archive"""
+    return StreamingResponse(
+        _stream_export(user_id, passphrase),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="vault-export.lpx"'},
+    )
+
+
+@password_router.get("/totp", status_code=status.HTTP_200_OK)
+async def get_user_totp_codes(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Current codes for all of the user's 2FA entries in one response"""
+    entries = await password_crud.get_user_totp_entries(db, user_id)
+    return totp.codes_payload(entries)
 
-    return decrypted_passwords
+
+async def _totp_events(subscription: Subscription, initial: str) -> AsyncIterator[str]:
+    try:
+        yield f"event: codes\ndata: {initial}\n\n"
+        while True:
+            yield f"event: codes\ndata: {await subscription.get()}\n\n"
+    finally:
+        totp_broadcaster.unsubscribe(subscription)
+
+
+@password_router.get("/totp/stream")
+async def stream_user_totp_codes(user_id: int = Depends(get_current_user_id)):
+    """Server-Sent Events stream pushing fresh codes at every period boundary"""
+    try:
+        subscription = totp_broadcaster.subscribe(user_id)
+    except TooManySubscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams",
+            headers={"Retry-After": "30"},
+        )
+    try:
+        initial = await totp_broadcaster.payload_for(user_id)
+    except Exception:
+        totp_broadcaster.unsubscribe(subscription)
+        raise
+    return StreamingResponse(
+        _totp_events(subscription, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@password_router.get("/search", response_model=list[password_schema.PasswordResponse])
+async def search_passwords(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Search title, email and username by prefix; only matches are decrypted"""
+    passwords = await password_crud.search_passwords(db, user_id, q, limit)
+    return [password_crud.decrypt_password_for_response(pwd) for pwd in passwords]
+
+
+@password_router.get("/changes", response_model=password_schema.ChangesResponse)
+async def get_changes(
+    since: str | None = Query(None, description="Cursor from a previous sync"),
+    limit: int | None = Query(None, ge=1, le=5000, description="Page size"),
+    accept: str | None = Header(None),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Entries created, updated or deleted since the last sync
+
+    Without ``since`` every entry is returned. Keep the returned ``cursor``
+    and send it as ``since`` next time; while ``has_more`` is set, call
+    again straight away to fetch the rest.
+    """
+    try:
+        since_seq, after_id = password_crud.decode_sync_cursor(since) if since else (0, None)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    version = await password_crud.get_vault_version(db, user_id)
+    if version is None:
+        raise unauthorized()
+    if since_seq > version:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor is ahead of the vault"
+        )
+
+    changed, deleted, next_position = [], [], None
+    if since_seq < version or after_id is not None:
+        changed, deleted, next_position = await password_crud.get_changes(
+            db,
+            user_id,
+            since_seq,
+            after_id,
+            limit or settings.SYNC_PAGE_SIZE,
+            # A client without a cursor has nothing to delete
+            include_deleted=since is not None,
+        )
+    cursor = (
+        password_crud.encode_sync_cursor(*next_position)
+        if next_position
+        else password_crud.encode_sync_cursor(version)
+    )
+
+    content = {
+        "changed": [password_crud.decrypt_password_for_response(pwd) for pwd in changed],
+        "deleted": deleted,
+        "cursor": cursor,
+        "has_more": next_position is not None,
+    }
+    return serialization.encoded_response(
+        content,
+        serialization.negotiate(accept),
+        headers={"Cache-Control": VAULT_CACHE_CONTROL, "Vary": "Accept"},
+    )
+
+
+@password_router.post(
+    "/audit/breached", response_model=password_schema.BreachAuditResponse
+)
+async def audit_breached_passwords(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Entries whose password appears in the offline breach corpus
+
+    Passwords are checked on the server against a local copy of the corpus;
+    nothing is sent to an outside service.
+    """
+    if not breach_checker.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Breach corpus is not configured",
+        )
+    entries = await password_crud.get_user_encrypted_passwords(db, user_id)
+    found = await breach_checker.check(
+        [(password_id, encrypted) for password_id, _, encrypted in entries]
+    )
+    return {
+        "checked": len(entries),
+        "breached": [
+            {"id": password_id, "title": title, "count": found[password_id]}
+            for password_id, title, _ in entries
+            if password_id in found
+        ],
+    }
+
+
+@password_router.get("/audit/reuse", response_model=password_schema.ReuseAuditResponse)
+async def audit_reused_passwords(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Entries that share a password, found without decrypting anything"""
+    groups, checked, pending = await password_crud.get_reused_passwords(
+        db, user_id, fingerprint_key_id()
+    )
+    return {
+        "groups": [
+            [{"id": password_id, "title": title} for password_id, title in group]
+            for group in groups
+        ],
+        "checked": checked,
+        "pending": pending,
+    }
+
+
+@password_router.post("/import", response_model=password_schema.ImportResponse)
+async def import_passwords(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+):
+    """Import another password manager's export from the request body
+
+    Send CSV (``text/csv``), NDJSON (``application/x-ndjson``) or a JSON
+    export (``application/json``). CSV and NDJSON are read as they arrive.
+    Each entry gets its own result; invalid entries do not stop the import.
+    """
+    entries = importers.read_entries(
+        request.headers.get("content-type", ""),
+        request.stream(),
+        settings.IMPORT_MAX_JSON_BYTES,
+    )
+    try:
+        results = await password_crud.import_passwords(user_id, entries)
+    except importers.UnsupportedImportType as exc:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc)
+        )
+    except importers.ImportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    created = sum(1 for result in results if result["status"] == "ok")
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+@password_router.post(
+    "/batch",
+    response_model=password_schema.BatchResponse,
+    responses={status.HTTP_409_CONFLICT: {"model": password_schema.BatchResponse}},
+)
+async def batch_update_passwords(
+    batch: password_schema.BatchRequest,
+    user_id: int = Depends(get_current_user_id),
+):
+    """Apply create, update and delete operations in one transaction
+
+    With ``atomic`` (the default) either every operation is applied or none
+    is, and a failure returns ``409`` with the reason per operation.
+    """
+    if len(batch.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch",
+        )
+    applied, results = await password_crud.apply_batch(
+        user_id, batch.operations, atomic=batch.atomic
+    )
+    body = {"applied": applied, "results": results}
+    if batch.atomic and not applied:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content=password_schema.BatchResponse(**body).model_dump(),
+        )
+    return body
 
 
 @password_router.post(
@@ -47,22 +384,11 @@ async def get_user_passwords(
 )
 async def create_password(
     password: password_schema.PasswordCreate,
-    secret: str = Query(..., description="User secret"),
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
 ):
     """Create a new password entry (requires authentication)"""
-    # Authenticate user
-    user = await user_crud.authenticate_user_secret(db, secret)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect secret or password",
-        )
-
     # Create encrypted password
-    db_password = await password_crud.create_password(
-        db=db, password=password, user_id=user.id
-    )
+    db_password = await password_crud.create_password(password=password, user_id=user_id)
     
     if not db_password:
         raise HTTPException(
@@ -77,24 +403,27 @@ async def create_password(
 @password_router.get("/{password_id}", response_model=password_schema.PasswordResponse)
 async def get_password(
     password_id: int,
-    secret: str = Query(..., description="User secret"),
+    response: Response,
+    if_none_match: str | None = Header(None),
+    user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
     """Get a specific password by ID (requires authentication)"""
-    # Authenticate user
-    user = await user_crud.authenticate_user_secret(db, secret)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect secret or password",
-        )
-
+    version = await password_crud.get_vault_version(db, user_id)
     password = await password_crud.get_password(db, password_id=password_id)
-    if not password or password.user_id != user.id:
+    if not password or password.user_id != user_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Password not found"
         )
 
+    # Only after the lookup: a guessed ETag must not reveal anything
+    etag = _vault_etag(user_id, version, password_id)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = VAULT_CACHE_CONTROL
+
     # Return with decrypted password
     return password_crud.decrypt_password_for_response(password)
 
@@ -105,21 +434,15 @@ async def get_password(
 async def update_password(
     password_id: int,
     password: password_schema.PasswordUpdate,
-    secret: str = Query(..., description="User secret"),
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
 ):
     """Update a password entry (requires authentication)"""
-    # Authenticate user
-    user = await user_crud.authenticate_user_secret(db, secret)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect secret or password",
+    try:
+        db_password = await password_crud.update_password(
+            password_id=password_id, password=password, user_id=user_id, fa_code=password.fa_code
         )
-
-    db_password = await password_crud.update_password(
-        db, password_id=password_id, password=password, user_id=user.id, fa_code=password.fa_code
-    )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     if not db_password:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Password not found"
@@ -132,21 +455,10 @@ async def update_password(
 @password_router.delete("/{password_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_password(
     password_id: int,
-    secret: str = Query(..., description="User secret"),
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
 ):
     """Delete a password entry (requires authentication)"""
-    # Authenticate user
-    user = await user_crud.authenticate_user_secret(db, secret)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect secret or password",
-        )
-
-    deleted = await password_crud.delete_password(
-        db, password_id=password_id, user_id=user.id
-    )
+    deleted = await password_crud.delete_password(password_id=password_id, user_id=user_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Password not found"
@@ -166,7 +478,7 @@ async def get_user_totop_code(
         )
     
     password = await password_crud.get_password(db, password_id)
-    if not password:
+    if not password or password.user_id != user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Password not found"
         )
@@ -174,15 +486,15 @@ async def get_user_totop_code(
     if not password.fa_code:
         return {"code": 0}
     
-    totp = pyotp.TOTP(password.fa_code)
-    current_token = totp.now()
-    time_remaining = 30 - (int(time.time() % 30))
+    now = time.time()
+    current_token, period = totp_cache.code(password.fa_code, now)
+    time_remaining = totp.time_remaining(period, now)
     
     next_request_time = time_remaining * 1000
             
     return {
         "success": True,
-        "user_id": user.user_id,
+        "user_id": user.id,
         "code": current_token,
         "time_remaining_seconds": time_remaining,
         "next_request_in_ms": next_request_time,
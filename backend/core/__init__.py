@@ -1,12 +1,52 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from backend.core.config import settings
+from backend.core import metrics, profiling
+
+
+def _engine_options(url: str) -> dict:
+    """Explicit pool sizing for file databases (in-memory SQLite uses one connection)"""
+    database = make_url(url).database
+    if database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    }
+
 
 # Create async engine
 engine = create_async_engine(
-    settings.DATABASE_URL, echo=settings.DATABASE_ECHO, future=True
+    settings.DATABASE_URL,
+    echo=settings.DATABASE_ECHO,
+    future=True,
+    **_engine_options(settings.DATABASE_URL),
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite engine profile to every new connection"""
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine.sync_engine)
+if settings.PROFILING_ENABLED:
+    profiling.instrument_engine(engine.sync_engine)
+
 # Async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -0,0 +1,149 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from .config import settings
+from .metrics import admission_decisions
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be queued; carries a Retry-After hint"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, per-client fair wait queue.
+
+    At most ``max_concurrent`` requests run at once. Others wait in one FIFO
+    per client, and freed slots are handed out round-robin across clients so
+    a single client bursting logins cannot push everyone else back. Requests
+    are rejected straight away when the queue (or the client's share of it)
+    is full, and after ``timeout`` seconds of waiting. A ``per_client`` of
+    0 leaves clients limited only by the shared queue.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        queue_size: int,
+        per_client: int,
+        timeout: float,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.per_client = per_client
+        self.timeout = timeout
+        self._active = 0
+        self._queued = 0
+        self._waiting: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        # Moving average of how long an admitted request holds its slot
+        self._service_time = 0.5
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue should have drained"""
+        slots = max(self.max_concurrent, 1)
+        return max(1, math.ceil((self._queued + 1) / slots * self._service_time))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        admission_decisions.inc(self.name, reason)
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _grant(self) -> None:
+        while self._active < self.max_concurrent and self._waiting:
+            client, waiters = next(iter(self._waiting.items()))
+            if not waiters:
+                del self._waiting[client]
+                continue
+            future = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+    def _forget(self, client: str, future: asyncio.Future) -> None:
+        waiters = self._waiting.get(client)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self._queued -= 1
+            if not waiters:
+                del self._waiting[client]
+
+    async def acquire(self, client: str) -> None:
+        if self.max_concurrent <= 0:
+            return
+        if self._active < self.max_concurrent and not self._queued:
+            self._active += 1
+            admission_decisions.inc(self.name, "admitted")
+            return
+
+        if self._queued >= self.queue_size:
+            raise self._reject("queue_full")
+        waiters = self._waiting.get(client)
+        if self.per_client > 0 and waiters is not None and len(waiters) >= self.per_client:
+            raise self._reject("client_limit")
+        if waiters is None:
+            waiters = self._waiting[client] = deque()
+
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except (TimeoutError, asyncio.CancelledError) as exc:
+            # Timed out or the client went away: give back a slot we may
+            # have been handed in the meantime
+            if future.done() and not future.cancelled():
+                self.release(None)
+            else:
+                self._forget(client, future)
+            if isinstance(exc, TimeoutError):
+                raise self._reject("timeout") from None
+            raise
+        admission_decisions.inc(self.name, "admitted")
+
+    def release(self, duration: float | None) -> None:
+        if self.max_concurrent <= 0:
+            return
+        self._active -= 1
+        if duration is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * duration
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, client: str):
+        await self.acquire(client)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+
+# Login and registration: each runs one Argon2 operation
+auth_admission = AdmissionController(
+    "auth",
+    max_concurrent=settings.AUTH_MAX_CONCURRENCY,
+    queue_size=settings.AUTH_QUEUE_SIZE,
+    per_client=settings.AUTH_QUEUE_PER_CLIENT,
+    timeout=settings.AUTH_QUEUE_TIMEOUT_SECONDS,
+)
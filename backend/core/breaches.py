@@ -0,0 +1,188 @@
+"""Offline check of passwords against a local breach corpus.
+
+The corpus is a Have I Been Pwned style text file, one ``HASH:COUNT`` line
+per hash, sorted by hash: upper-case SHA-1 (40 hex digits) or NTLM (32).
+It is memory-mapped and binary-searched in place, so a file of tens of GB
+costs only the pages a lookup touches, and those pages are shared by every
+worker process through the page cache.
+"""
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .config import settings
+from .security import decrypt_password
+
+logger = logging.getLogger(__name__)
+
+_HASH_LENGTHS = {"sha1": 40, "ntlm": 32}
+
+
+def _md4(data: bytes) -> bytes:
+    """RFC 1320 MD4, for OpenSSL builds without the legacy provider"""
+    mask = 0xFFFFFFFF
+
+    def rotl(value: int, bits: int) -> int:
+        value &= mask
+        return ((value << bits) | (value >> (32 - bits))) & mask
+
+    length = len(data) * 8
+    data += b"\x80" + b"\x00" * ((55 - len(data)) % 64) + struct.pack("<Q", length)
+    a, b, c, d = 0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476
+    for offset in range(0, len(data), 64):
+        x = struct.unpack("<16I", data[offset : offset + 64])
+        aa, bb, cc, dd = a, b, c, d
+        for i in (0, 4, 8, 12):
+            a = rotl(a + ((b & c) | (~b & d)) + x[i], 3)
+            d = rotl(d + ((a & b) | (~a & c)) + x[i + 1], 7)
+            c = rotl(c + ((d & a) | (~d & b)) + x[i + 2], 11)
+            b = rotl(b + ((c & d) | (~c & a)) + x[i + 3], 19)
+        for i in (0, 1, 2, 3):
+            a = rotl(a + ((b & c) | (b & d) | (c & d)) + x[i] + 0x5A827999, 3)
+            d = rotl(d + ((a & b) | (a & c) | (b & c)) + x[i + 4] + 0x5A827999, 5)
+            c = rotl(c + ((d & a) | (d & b) | (a & b)) + x[i + 8] + 0x5A827999, 9)
+            b = rotl(b + ((c & d) | (c & a) | (d & a)) + x[i + 12] + 0x5A827999, 13)
+        for i in (0, 2, 1, 3):
+            a = rotl(a + (b ^ c ^ d) + x[i] + 0x6ED9EBA1, 3)
+            d = rotl(d + (a ^ b ^ c) + x[i + 8] + 0x6ED9EBA1, 9)
+            c = rotl(c + (d ^ a ^ b) + x[i + 4] + 0x6ED9EBA1, 11)
+            b = rotl(b + (c ^ d ^ a) + x[i + 12] + 0x6ED9EBA1, 15)
+        a, b, c, d = (a + aa) & mask, (b + bb) & mask, (c + cc) & mask, (d + dd) & mask
+    return struct.pack("<4I", a, b, c, d)
+
+
+def password_hash(password: str, algorithm: str) -> bytes:
+    """Upper-case hex digest of a password as the corpus stores it"""
+    if algorithm == "sha1":
+        digest = hashlib.sha1(password.encode(), usedforsecurity=False).digest()
+    elif algorithm == "ntlm":
+        data = password.encode("utf-16-le")
+        try:
+            digest = hashlib.new("md4", data, usedforsecurity=False).digest()
+        except ValueError:
+            digest = _md4(data)
+    else:
+        raise ValueError(f"Unknown breach corpus hash {algorithm!r}")
+    return digest.hex().upper().encode()
+
+
+class BreachCorpus:
+    """Sorted ``HASH:COUNT`` lines, looked up without loading the file"""
+
+    def __init__(self, path: str | Path, algorithm: str = "sha1"):
+        if algorithm not in _HASH_LENGTHS:
+            raise ValueError(f"Unknown breach corpus hash {algorithm!r}")
+        self.path = Path(path)
+        self.algorithm = algorithm
+        self.hash_length = _HASH_LENGTHS[algorithm]
+        with open(self.path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_RANDOM"):
+            # Binary search jumps around: read-ahead would only waste memory
+            self._map.madvise(mmap.MADV_RANDOM)
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def close(self) -> None:
+        self._map.close()
+
+    def count(self, hex_digest: bytes) -> int:
+        """Times the hash appears in breaches; 0 if it is not in the corpus"""
+        data = self._map
+        key_length = self.hash_length
+        # lo and hi always sit at the start of a line
+        lo, hi = 0, len(data)
+        while lo < hi:
+            start = data.rfind(b"\n", 0, (lo + hi) // 2) + 1
+            key = data[start : start + key_length]
+            if key < hex_digest:
+                end = data.find(b"\n", start)
+                lo = end + 1 if end != -1 else hi
+            elif key > hex_digest:
+                hi = start
+            else:
+                end = data.find(b"\n", start)
+                line = data[start : end if end != -1 else len(data)]
+                _, _, count = line.partition(b":")
+                return int(count.strip() or 1)
+        return 0
+
+    def count_password(self, password: str) -> int:
+        return self.count(password_hash(password, self.algorithm))
+
+
+class BreachChecker:
+    """Checks vault entries against the corpus in a small thread pool.
+
+    Each job decrypts and looks up one batch of entries, so neither the
+    decryption nor the page faults of the lookups run on the event loop.
+    """
+
+    def __init__(self, path: str | None, algorithm: str, workers: int, batch_size: int):
+        self.path = path
+        self.algorithm = algorithm
+        self.workers = workers
+        self.batch_size = batch_size
+        self._corpus: BreachCorpus | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def available(self) -> bool:
+        return self._corpus is not None
+
+    def start(self) -> None:
+        if not self.path or self._corpus is not None:
+            return
+        try:
+            self._corpus = BreachCorpus(self.path, self.algorithm)
+        except (OSError, ValueError) as exc:
+            logger.error("Breach corpus %s unavailable: %s", self.path, exc)
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, self.workers), thread_name_prefix="breach-check"
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._corpus is not None:
+            self._corpus.close()
+            self._corpus = None
+
+    def _check_batch(self, rows: list[tuple[int, str | bytes]]) -> list[tuple[int, int]]:
+        corpus = self._corpus
+        found = []
+        for password_id, encrypted in rows:
+            count = corpus.count_password(decrypt_password(encrypted))
+            if count:
+                found.append((password_id, count))
+        return found
+
+    async def check(self, rows: list[tuple[int, str | bytes]]) -> dict[int, int]:
+        """Breach count of every (id, encrypted password) found in the corpus"""
+        loop = asyncio.get_running_loop()
+        jobs = [
+            loop.run_in_executor(
+                self._executor, self._check_batch, rows[start : start + self.batch_size]
+            )
+            for start in range(0, len(rows), self.batch_size)
+        ]
+        found = {}
+        for batch in await asyncio.gather(*jobs):
+            found.update(batch)
+        return found
+
+
+breach_checker = BreachChecker(
+    path=settings.BREACH_CORPUS_PATH,
+    algorithm=settings.BREACH_CORPUS_HASH,
+    workers=settings.BREACH_CHECK_WORKERS,
+    batch_size=settings.BREACH_CHECK_BATCH_SIZE,
+)
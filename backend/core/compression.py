@@ -0,0 +1,158 @@
+"""Response compression: zstd when the client and server support it, else gzip.
+
+Bodies smaller than COMPRESSION_MIN_SIZE, already encoded bodies and media
+types that are already compressed or must not be buffered (the encrypted
+export archive, Server-Sent Events) pass through untouched. Streaming
+responses are compressed chunk by chunk with a flush after every chunk, so
+NDJSON entries still reach the client as they are produced.
+"""
+
+import gzip
+import zlib
+
+from .config import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "text/plain",
+    "text/html",
+)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Preferred supported coding from an Accept-Encoding header"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for coding in ("zstd", "gzip"):
+        if coding == "zstd" and zstandard is None:
+            continue
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL)
+            self._stream = self._zstd.compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._zstd = None
+            # wbits 31 = gzip container
+            self._stream = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def whole(self, body: bytes) -> bytes:
+        if self._zstd is not None:
+            return self._zstd.compress(body)
+        return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+    def chunk(self, body: bytes) -> bytes:
+        return self._stream.compress(body) + self._stream.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._stream.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = (
+            settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: _Compressor | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                media_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or not media_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                if not more_body:
+                    body = compressor.whole(body)
+                    await send(self._compressed_start(start_message, encoding, len(body)))
+                    await send({**message, "body": body})
+                    return
+                await send(self._compressed_start(start_message, encoding))
+
+            if more_body:
+                await send({**message, "body": compressor.chunk(body)})
+            else:
+                await send({**message, "body": compressor.chunk(body) + compressor.finish()})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressed_start(message, encoding: str, length: int | None = None) -> dict:
+        headers = []
+        for key, value in message.get("headers", []):
+            lower = key.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"etag" and not value.startswith(b"W/"):
+                # The bytes differ from the identity representation
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return {**message, "headers": headers}
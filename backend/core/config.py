@@ -4,8 +4,100 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///database.db"
     DATABASE_ECHO: bool = False
+    # Create tables and run migrations in the app lifespan; serve.py does it
+    # once before forking workers and turns this off
+    DATABASE_SETUP_ON_STARTUP: bool = True
+
+    # Engine profile: connection pool and per-connection SQLite pragmas
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: int = 30
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+
+    # Background PRAGMA optimize / WAL checkpoint (0 = disabled)
+    DATABASE_MAINTENANCE_INTERVAL_SECONDS: int = 3600
     SECRET_KEY: str = "idk-bro-if-you-are-reading-this-you-are-damn))"
     ALGORITHM: str = "HS256"
+    # Format for newly written passwords: "aesgcm", "chacha20" or "fernet".
+    # Every format stays readable, whatever this is set to.
+    CIPHER: str = "aesgcm"
+    # Retired SECRET_KEYs still accepted for decryption during key rotation
+    PREVIOUS_SECRET_KEYS: list[str] = []
+    # Optional owner-only file caching the derived encryption keys; it is
+    # used at once and re-derived in the background to catch a stale file
+    FERNET_KEY_FILE: str | None = None
+
+    # Background re-encryption after a SECRET_KEY change
+    KEY_ROTATION_ON_STARTUP: bool = False
+    KEY_ROTATION_BATCH_SIZE: int = 500
+    KEY_ROTATION_PAUSE_MS: int = 50
+
+    # Fill in password fingerprints missing or made under an old key
+    FINGERPRINT_BACKFILL_ON_STARTUP: bool = True
+    FINGERPRINT_BACKFILL_BATCH_SIZE: int = 500
+    FINGERPRINT_BACKFILL_PAUSE_MS: int = 50
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    # Copy revoked tokens in from the database every few seconds, so a logout
+    # on one worker process holds on all of them; serve.py turns this on
+    # with >1 worker
+    TOKEN_DENYLIST_SHARED: bool = False
+    TOKEN_DENYLIST_REFRESH_SECONDS: float = 1.0
+
+    # Group commit for vault writes (max size 0 = commit each write on its own)
+    WRITE_BATCH_MAX_SIZE: int = 64
+    WRITE_BATCH_MAX_WAIT_MS: float = 0.0
+
+    # Argon2 hashing pool (0 workers = hash inline on the event loop)
+    HASH_POOL_SIZE: int = 2
+    HASH_QUEUE_DEPTH: int = 32
+
+    # Bulk import and batch mutations
+    IMPORT_CHUNK_SIZE: int = 500
+    IMPORT_MAX_ENTRIES: int = 50_000
+    IMPORT_MAX_JSON_BYTES: int = 32 * 1024 * 1024
+    BATCH_MAX_OPERATIONS: int = 1000
+
+    # Delta sync: default number of changes per /passwords/changes page
+    SYNC_PAGE_SIZE: int = 500
+
+    # Content-addressed logo store; uploads are pre-resized to LOGO_SIZES
+    LOGO_DIR: str = "logos"
+    LOGO_MAX_BYTES: int = 512 * 1024
+    LOGO_SIZES: list[int] = [32, 64, 128]
+
+    # Offline breach check: sorted HIBP-style "HASH:COUNT" file ("sha1" or
+    # "ntlm" hashes), memory-mapped; the audit endpoint is off without it
+    BREACH_CORPUS_PATH: str | None = None
+    BREACH_CORPUS_HASH: str = "sha1"
+    BREACH_CHECK_WORKERS: int = 2
+    BREACH_CHECK_BATCH_SIZE: int = 256
+
+    # Admission control for login/register: concurrent Argon2 requests, then
+    # a bounded wait queue shared fairly between clients (0 = no limit)
+    AUTH_MAX_CONCURRENCY: int = 2
+    AUTH_QUEUE_SIZE: int = 64
+    AUTH_QUEUE_PER_CLIENT: int = 4  # 0 = only the shared queue limit applies
+    AUTH_QUEUE_TIMEOUT_SECONDS: float = 10.0
+
+    # Memoized TOTP codes, one per (secret, 30s window)
+    TOTP_CACHE_SIZE: int = 10_000
+    TOTP_STREAM_MAX_SUBSCRIBERS: int = 10_000
+
+    # Prometheus-style /metrics endpoint and request/query instrumentation
+    METRICS_ENABLED: bool = True
+    # Response compression (zstd needs the optional zstandard package)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Per-request Server-Timing breakdown and repeated-query warnings
+    PROFILING_ENABLED: bool = False
+    PROFILING_REPEAT_THRESHOLD: int = 5
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,144 @@
+"""Encrypted vault archive format.
+
+An archive is a header followed by length-prefixed AES-GCM frames. The
+plaintext of all frames, concatenated, is a gzip stream of NDJSON records.
+Frames are produced as the input arrives, so an archive of any size can be
+written and read with constant memory.
+
+    header = MAGIC | version (1) | iterations (4) | salt (16) | nonce prefix (8)
+    frame  = length (4) | AES-GCM(key, nonce prefix | counter (4), chunk)
+
+Each frame authenticates the header, its counter and whether it is the last
+frame, so frames cannot be reordered, dropped or truncated unnoticed.
+"""
+
+import os
+import struct
+import zlib
+from typing import Iterable, Iterator
+
+MAGIC = b"LPEXPORT"
+VERSION = 1
+KDF_ITERATIONS = 600_000
+FRAME_SIZE = 64 * 1024
+
+_HEADER = struct.Struct(">8sBI16s8s")
+_LENGTH = struct.Struct(">I")
+
+
+class InvalidArchive(Exception):
+    """Raised when an archive is corrupt or the passphrase is wrong"""
+
+
+def derive_export_key(passphrase: str, salt: bytes, iterations: int = KDF_ITERATIONS) -> bytes:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations)
+    return kdf.derive(passphrase.encode())
+
+
+def _aad(header: bytes, counter: int, final: bool) -> bytes:
+    return header + struct.pack(">I?", counter, final)
+
+
+class ExportWriter:
+    """Incrementally compresses and encrypts NDJSON lines into an archive"""
+
+    def __init__(self, salt: bytes, iterations: int = KDF_ITERATIONS):
+        self._aead = None
+        self._nonce_prefix = os.urandom(8)
+        # The header needs no key, so it can go out before the slow KDF runs
+        self.header = _HEADER.pack(MAGIC, VERSION, iterations, salt, self._nonce_prefix)
+        self._compressor = zlib.compressobj(wbits=31)  # gzip container
+        self._buffer = bytearray()
+        self._counter = 0
+
+    def set_key(self, key: bytes) -> None:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        self._aead = AESGCM(key)
+
+    def _frame(self, chunk: bytes, final: bool) -> bytes:
+        nonce = self._nonce_prefix + struct.pack(">I", self._counter)
+        sealed = self._aead.encrypt(nonce, chunk, _aad(self.header, self._counter, final))
+        self._counter += 1
+        return _LENGTH.pack(len(sealed)) + sealed
+
+    def write(self, data: bytes) -> bytes:
+        """Feed plaintext; returns any frames that are ready (possibly b"")"""
+        self._buffer += self._compressor.compress(data)
+        frames = []
+        while len(self._buffer) > FRAME_SIZE:
+            frames.append(self._frame(bytes(self._buffer[:FRAME_SIZE]), final=False))
+            del self._buffer[:FRAME_SIZE]
+        return b"".join(frames)
+
+    def finish(self) -> bytes:
+        self._buffer += self._compressor.flush()
+        frames = []
+        while len(self._buffer) > FRAME_SIZE:
+            frames.append(self._frame(bytes(self._buffer[:FRAME_SIZE]), final=False))
+            del self._buffer[:FRAME_SIZE]
+        frames.append(self._frame(bytes(self._buffer), final=True))
+        self._buffer.clear()
+        return b"".join(frames)
+
+
+def read_export(chunks: Iterable[bytes], passphrase: str) -> Iterator[bytes]:
+    """Yield the NDJSON lines stored in an archive, verifying every frame"""
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    buffer = bytearray()
+    source = iter(chunks)
+
+    def take(size: int) -> bytes | None:
+        while len(buffer) < size:
+            chunk = next(source, None)
+            if chunk is None:
+                return None
+            buffer.extend(chunk)
+        data = bytes(buffer[:size])
+        del buffer[:size]
+        return data
+
+    header = take(_HEADER.size)
+    if header is None:
+        raise InvalidArchive("Truncated header")
+    magic, version, iterations, salt, nonce_prefix = _HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise InvalidArchive("Not a vault export")
+
+    aead = AESGCM(derive_export_key(passphrase, salt, iterations))
+    decompressor = zlib.decompressobj(wbits=31)
+    pending = b""
+    counter = 0
+    while True:
+        length = take(_LENGTH.size)
+        if length is None:
+            raise InvalidArchive("Archive is truncated")
+        sealed = take(_LENGTH.unpack(length)[0])
+        if sealed is None:
+            raise InvalidArchive("Archive is truncated")
+
+        nonce = nonce_prefix + struct.pack(">I", counter)
+        final = False
+        for final in (False, True):
+            try:
+                chunk = aead.decrypt(nonce, sealed, _aad(header, counter, final))
+                break
+            except InvalidTag:
+                chunk = None
+        if chunk is None:
+            raise InvalidArchive("Wrong passphrase or corrupt archive")
+        counter += 1
+
+        lines = (pending + decompressor.decompress(chunk)).split(b"\n")
+        pending = lines.pop()
+        yield from (line for line in lines if line)
+        if final:
+            break
+
+    if pending + decompressor.flush():
+        raise InvalidArchive("Archive ends mid-record")
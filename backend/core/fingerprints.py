@@ -0,0 +1,120 @@
+"""Backfill of ``passwords.password_fingerprint``.
+
+Rows written before fingerprints existed have none, and fingerprints made
+under a previous SECRET_KEY no longer match new ones. The job walks
+``passwords`` by id in small batches, decrypting off the event loop and
+writing each batch in its own short transaction. Finished rows stop
+matching its query, so an interrupted run simply starts over cheaply.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import bindparam, text
+
+from . import AsyncSessionLocal
+from .config import settings
+from .security import decrypt_password, fingerprint_key_id, fingerprint_password
+
+logger = logging.getLogger(__name__)
+
+# Rows without a fingerprint under the current key
+STALE_FINGERPRINT = (
+    "(password_fingerprint IS NULL OR substr(password_fingerprint, 1, 4) != :key_id)"
+)
+
+
+def _fingerprint_rows(rows: list[tuple[int, int, str | bytes]]) -> list[dict]:
+    updates = []
+    undecryptable = []
+    for row_id, user_id, token in rows:
+        try:
+            password = decrypt_password(token)
+        except Exception:
+            # Encrypted under a key that is no longer configured
+            undecryptable.append(row_id)
+            continue
+        updates.append(
+            {"id": row_id, "old": token, "fingerprint": fingerprint_password(user_id, password)}
+        )
+    if undecryptable:
+        logger.warning(
+            "Cannot fingerprint %d undecryptable passwords (ids %d-%d)",
+            len(undecryptable), undecryptable[0], undecryptable[-1],
+        )
+    return updates
+
+
+class FingerprintBackfillJob:
+    """Throttled fill-in of missing or stale password fingerprints"""
+
+    def __init__(self, batch_size: int, pause_ms: int):
+        self.batch_size = batch_size
+        self.pause = pause_ms / 1000
+        self.filled = 0
+        self._task: asyncio.Task | None = None
+
+    async def _backfill_batch(self, last_id: int, key_id: bytes) -> int | None:
+        """Fingerprint the next batch; returns its last id, None when done"""
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    text(
+                        "SELECT id, user_id, encrypted_password FROM passwords "
+                        f"WHERE id > :last_id AND {STALE_FINGERPRINT} "
+                        "ORDER BY id LIMIT :limit"
+                    ),
+                    {"last_id": last_id, "key_id": key_id, "limit": self.batch_size},
+                )
+            ).all()
+            if not rows:
+                return None
+
+            updates = await asyncio.to_thread(_fingerprint_rows, [tuple(r) for r in rows])
+            if updates:
+                # Compare-and-set: a password changed meanwhile has its own fingerprint
+                await db.execute(
+                    text(
+                        "UPDATE passwords SET password_fingerprint = :fingerprint "
+                        "WHERE id = :id AND encrypted_password = :old"
+                    ).bindparams(bindparam("id"), bindparam("old"), bindparam("fingerprint")),
+                    updates,
+                )
+                await db.commit()
+            self.filled += len(updates)
+        return rows[-1].id
+
+    async def run(self) -> int:
+        """Fingerprint every row that needs it; returns how many were filled"""
+        key_id = await asyncio.to_thread(fingerprint_key_id)
+        last_id = 0
+        while (last_id := await self._backfill_batch(last_id, key_id)) is not None:
+            await asyncio.sleep(self.pause)
+        if self.filled:
+            logger.info("Fingerprint backfill finished: %d rows", self.filled)
+        return self.filled
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_logged(), name="fingerprint-backfill")
+
+    async def _run_logged(self) -> None:
+        try:
+            await self.run()
+        except Exception:
+            logger.exception("Fingerprint backfill failed; it will resume on the next run")
+
+    async def shutdown(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+fingerprint_backfill_job = FingerprintBackfillJob(
+    batch_size=settings.FINGERPRINT_BACKFILL_BATCH_SIZE,
+    pause_ms=settings.FINGERPRINT_BACKFILL_PAUSE_MS,
+)
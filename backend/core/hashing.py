@@ -0,0 +1,81 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import settings
+from . import security
+from .metrics import crypto_duration
+
+
+class HashingQueueFull(Exception):
+    """Raised when the hashing pool already has too many jobs waiting"""
+
+
+class HashingService:
+    """Runs Argon2 hashing/verification in a bounded process pool.
+
+    Argon2 is deliberately CPU heavy, so running it on the event loop stalls
+    every other request on the worker. Jobs are handed to a process pool and
+    at most ``pool_size + queue_depth`` of them may be in flight at once;
+    anything beyond that is rejected with ``HashingQueueFull``.
+    """
+
+    def __init__(self, pool_size: int, queue_depth: int):
+        self.pool_size = pool_size
+        self.queue_depth = queue_depth
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def start(self) -> None:
+        if self.pool_size <= 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.pool_size,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, func, *args):
+        # Timed here rather than in the workers, whose metrics would stay in
+        # their own processes; queueing time is included
+        started = time.perf_counter()
+        if self.pool_size <= 0:
+            try:
+                return func(*args)
+            finally:
+                crypto_duration.observe(time.perf_counter() - started, operation)
+
+        if self._in_flight >= self.pool_size + self.queue_depth:
+            raise HashingQueueFull("Too many hashing jobs in flight")
+
+        self.start()
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._in_flight -= 1
+            crypto_duration.observe(time.perf_counter() - started, operation)
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run("hash", security.hash_password, password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            "verify", security.verify_password, plain_password, hashed_password
+        )
+
+
+hashing_service = HashingService(
+    pool_size=settings.HASH_POOL_SIZE,
+    queue_depth=settings.HASH_QUEUE_DEPTH,
+)
@@ -0,0 +1,163 @@
+"""Readers for vault exports of other password managers.
+
+CSV (Chrome/Edge/Firefox, Bitwarden, LastPass, 1Password, KeePassXC) and
+NDJSON are parsed as the request body streams in; JSON exports (Bitwarden,
+or a plain list of entries) are parsed as one document. Every reader yields
+``(index, entry)`` where ``entry`` is a dict in our field names, or an
+error message for records that could not be read.
+"""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+from urllib.parse import urlparse
+
+CSV_TYPES = ("text/csv", "application/csv")
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+JSON_TYPES = ("application/json",)
+
+# Column/key names used by common exporters, lower-cased
+_ALIASES = {
+    "title": ("title", "name", "account"),
+    "url": ("url", "login_uri", "login url", "website", "uri"),
+    "username": ("username", "login_username", "login", "user name", "user"),
+    "email": ("email", "e-mail"),
+    "password": ("password", "login_password"),
+    "fa_code": ("fa_code", "totp", "login_totp", "otpauth", "one-time password", "otp"),
+    "logo": ("logo",),
+}
+
+
+class ImportFormatError(ValueError):
+    """The body could not be read as an export"""
+
+
+class UnsupportedImportType(ImportFormatError):
+    """The content type is not one we can import"""
+
+
+def normalize(record: dict) -> dict:
+    """Map an exported record onto PasswordCreate fields"""
+    if isinstance(record.get("login"), dict):
+        # Bitwarden JSON: credentials are nested under "login"
+        login = record["login"]
+        uris = login.get("uris") or []
+        record = {
+            **{key: value for key, value in record.items() if key != "login"},
+            **login,
+            "url": uris[0].get("uri") if uris and isinstance(uris[0], dict) else None,
+        }
+
+    lowered = {str(key).strip().lower(): value for key, value in record.items()}
+    entry = {}
+    for field, names in _ALIASES.items():
+        for name in names:
+            # Only text: a null or nested value must not shadow a later alias
+            value = lowered.get(name)
+            if isinstance(value, str) and value.strip():
+                entry[field] = value.strip()
+                break
+
+    url = entry.pop("url", None)
+    if "title" not in entry and isinstance(url, str):
+        entry["title"] = urlparse(url if "//" in url else f"//{url}").hostname or url
+    if "email" not in entry:
+        username = entry.get("username") or ""
+        entry["email"] = username if "@" in username else ""
+    return entry
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def read_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    header: list[str] | None = None
+    record = ""
+    index = 0
+    async for line in _lines(chunks):
+        record += line
+        # A quoted field may contain newlines: wait for balanced quotes
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        try:
+            row = next(csv.reader([text]))
+        except csv.Error as exc:
+            yield index, f"Unreadable CSV row: {exc}"
+            index += 1
+            continue
+        if header is None:
+            header = row
+            continue
+        yield index, normalize(dict(zip(header, row)))
+        index += 1
+    if record.strip():
+        yield index, "Unterminated quoted field at end of file"
+
+
+async def read_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    index = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield index, "Invalid JSON line"
+        else:
+            yield index, normalize(record) if isinstance(record, dict) else "Expected an object"
+        index += 1
+
+
+def read_json(body: bytes) -> list[dict | str]:
+    try:
+        document = json.loads(body)
+    except ValueError:
+        raise ImportFormatError("Body is not valid JSON")
+    if isinstance(document, dict):
+        # Bitwarden: {"items": [...]}, with type 1 = login
+        items = document.get("items", document.get("entries"))
+        if not isinstance(items, list):
+            raise ImportFormatError("Expected a list of entries or an 'items' array")
+        items = [item for item in items if not isinstance(item, dict) or item.get("type", 1) == 1]
+    elif isinstance(document, list):
+        items = document
+    else:
+        raise ImportFormatError("Expected a list of entries or an 'items' array")
+    return [normalize(item) if isinstance(item, dict) else "Expected an object" for item in items]
+
+
+async def read_entries(
+    content_type: str, chunks: AsyncIterator[bytes], max_json_bytes: int
+) -> AsyncIterator[tuple[int, dict | str]]:
+    """Dispatch on the media type of the upload"""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in CSV_TYPES:
+        async for item in read_csv(chunks):
+            yield item
+    elif media_type in NDJSON_TYPES:
+        async for item in read_ndjson(chunks):
+            yield item
+    elif media_type in JSON_TYPES:
+        body = bytearray()
+        async for chunk in chunks:
+            body += chunk
+            if len(body) > max_json_bytes:
+                raise ImportFormatError("JSON export is too large; use CSV or NDJSON")
+        for index, entry in enumerate(read_json(bytes(body))):
+            yield index, entry
+    else:
+        raise UnsupportedImportType(f"Unsupported content type {media_type or '(none)'}")
@@ -0,0 +1,205 @@
+"""Online re-encryption of stored passwords after a SECRET_KEY change.
+
+Put the old key into PREVIOUS_SECRET_KEYS and the new one into SECRET_KEY
+(or switch CIPHER); reads keep working with either. The job then walks ``passwords`` in
+keyset-paginated batches, re-encrypting each batch in its own short
+transaction and pausing between batches. Progress is stored per target key
+in ``key_rotation_state``, so an interrupted run resumes where it stopped.
+
+Run it in the background with KEY_ROTATION_ON_STARTUP=true, or on its own
+with ``python rotate_keys.py``.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, text
+
+from . import AsyncSessionLocal
+from .config import settings
+from .security import current_key_id, decrypt_password, encrypt_password, fingerprint_password
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RotationProgress:
+    key_fingerprint: str
+    last_id: int
+    rotated: int
+    total: int
+    finished: bool
+
+    @property
+    def percent(self) -> float:
+        return 100.0 if not self.total else min(100.0, 100 * self.rotated / self.total)
+
+
+def _rotate_rows(rows: list[tuple[int, int, str | bytes]]) -> list[dict]:
+    updates = []
+    undecryptable = []
+    for row_id, user_id, token in rows:
+        try:
+            password = decrypt_password(token)
+        except Exception:
+            # Encrypted under a key that is no longer configured: skip it
+            # rather than stall the job on this batch forever
+            undecryptable.append(row_id)
+            continue
+        # The fingerprint key changes with SECRET_KEY too
+        updates.append(
+            {
+                "id": row_id,
+                "old": token,
+                "new": encrypt_password(password),
+                "fingerprint": fingerprint_password(user_id, password),
+            }
+        )
+    if undecryptable:
+        logger.warning(
+            "Cannot re-encrypt %d undecryptable passwords (ids %d-%d)",
+            len(undecryptable), undecryptable[0], undecryptable[-1],
+        )
+    return updates
+
+
+class KeyRotationJob:
+    """Resumable, throttled re-encryption of ``passwords.encrypted_password``"""
+
+    def __init__(self, batch_size: int, pause_ms: int):
+        self.batch_size = batch_size
+        self.pause = pause_ms / 1000
+        self.progress: RotationProgress | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _load_state(self, fingerprint: str) -> RotationProgress:
+        now = datetime.utcnow().isoformat()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text(
+                    "INSERT OR IGNORE INTO key_rotation_state "
+                    "(key_fingerprint, started_at, updated_at) VALUES (:fp, :now, :now)"
+                ),
+                {"fp": fingerprint, "now": now},
+            )
+            await db.commit()
+            state = (
+                await db.execute(
+                    text(
+                        "SELECT last_id, rotated, finished_at FROM key_rotation_state "
+                        "WHERE key_fingerprint = :fp"
+                    ),
+                    {"fp": fingerprint},
+                )
+            ).one()
+            total = (await db.execute(text("SELECT count(*) FROM passwords"))).scalar_one()
+        return RotationProgress(
+            key_fingerprint=fingerprint,
+            last_id=state.last_id,
+            rotated=state.rotated,
+            total=total,
+            finished=state.finished_at is not None,
+        )
+
+    async def _rotate_batch(self, progress: RotationProgress) -> bool:
+        """Re-encrypt the next batch; False once there is nothing left"""
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    text(
+                        "SELECT id, user_id, encrypted_password FROM passwords "
+                        "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                    ),
+                    {"last_id": progress.last_id, "limit": self.batch_size},
+                )
+            ).all()
+            if not rows:
+                return False
+
+            # Crypto runs off the event loop; the write is a short transaction
+            updates = await asyncio.to_thread(_rotate_rows, [tuple(r) for r in rows])
+            if updates:
+                # Compare-and-set: rows changed by a user meanwhile already use the new key
+                result = await db.execute(
+                    text(
+                        "UPDATE passwords SET encrypted_password = :new, "
+                        "password_fingerprint = :fingerprint "
+                        "WHERE id = :id AND encrypted_password = :old"
+                    ).bindparams(
+                        bindparam("id"), bindparam("old"), bindparam("new"), bindparam("fingerprint")
+                    ),
+                    updates,
+                )
+                progress.rotated += result.rowcount
+            progress.last_id = rows[-1].id
+            await db.execute(
+                text(
+                    "UPDATE key_rotation_state SET last_id = :last_id, rotated = :rotated, "
+                    "updated_at = :now WHERE key_fingerprint = :fp"
+                ),
+                {
+                    "last_id": progress.last_id,
+                    "rotated": progress.rotated,
+                    "now": datetime.utcnow().isoformat(),
+                    "fp": progress.key_fingerprint,
+                },
+            )
+            await db.commit()
+        return True
+
+    async def _finish(self, progress: RotationProgress) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text(
+                    "UPDATE key_rotation_state SET finished_at = :now "
+                    "WHERE key_fingerprint = :fp"
+                ),
+                {"now": datetime.utcnow().isoformat(), "fp": progress.key_fingerprint},
+            )
+            await db.commit()
+        progress.finished = True
+
+    async def run(self) -> RotationProgress:
+        """Rotate every row to the current SECRET_KEY and CIPHER, resuming if interrupted"""
+        target = f"{(await asyncio.to_thread(current_key_id)).hex()}:{settings.CIPHER}"
+        progress = await self._load_state(target)
+        self.progress = progress
+        if progress.finished:
+            return progress
+
+        logger.info("Key rotation starting at id %d of ~%d rows", progress.last_id, progress.total)
+        while await self._rotate_batch(progress):
+            logger.info(
+                "Key rotation: %d rows re-encrypted (%.1f%%)", progress.rotated, progress.percent
+            )
+            await asyncio.sleep(self.pause)
+        await self._finish(progress)
+        logger.info("Key rotation finished: %d rows re-encrypted", progress.rotated)
+        return progress
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_logged(), name="key-rotation")
+
+    async def _run_logged(self) -> None:
+        try:
+            await self.run()
+        except Exception:
+            logger.exception("Key rotation failed; it will resume on the next run")
+
+    async def shutdown(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+key_rotation_job = KeyRotationJob(
+    batch_size=settings.KEY_ROTATION_BATCH_SIZE,
+    pause_ms=settings.KEY_ROTATION_PAUSE_MS,
+)
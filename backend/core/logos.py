@@ -0,0 +1,151 @@
+"""Content-addressed store for entry logos.
+
+A logo is stored once on disk under the SHA-256 of its bytes, however many
+entries (or users) reference it, and is served from an immutable URL that
+browsers cache for good. With Pillow installed (``pip install Pillow``)
+uploads are also pre-resized to ``LOGO_SIZES`` as PNG; without it the
+original is served for every size.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import io
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from .config import settings
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Raster formats only: SVG can carry script
+_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/x-icon": "ico",
+}
+# Larger images are rejected before decoding
+_MAX_PIXELS = 4096 * 4096
+
+
+class InvalidLogo(ValueError):
+    """The upload is not an image we accept"""
+
+
+@lru_cache(maxsize=1)
+def can_resize() -> bool:
+    """Whether Pillow is installed; it is only imported once a logo is resized"""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def sniff(data: bytes) -> str | None:
+    """Media type from the file signature; the upload's header is not trusted"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"\x00\x00\x01\x00"):
+        return "image/x-icon"
+    return None
+
+
+class LogoStore:
+    """Logos under ``root/<first two hex digits>/<sha256>[-<size>].<ext>``"""
+
+    def __init__(self, root: str | Path, sizes: list[int]):
+        self.root = Path(root)
+        self.sizes = sorted(sizes)
+
+    @property
+    def variant_sizes(self) -> list[int]:
+        """Sizes actually pre-resized (none without Pillow)"""
+        return self.sizes if can_resize() else []
+
+    def _directory(self, digest: str) -> Path:
+        return self.root / digest[:2]
+
+    def find(self, digest: str, size: int | None = None) -> tuple[Path, str] | None:
+        """File and media type to serve: the smallest variant of at least
+        ``size`` pixels, else the original"""
+        if not HASH_PATTERN.match(digest):
+            return None
+        directory = self._directory(digest)
+        if size is not None and can_resize():
+            for variant in self.sizes:
+                if variant >= size:
+                    path = directory / f"{digest}-{variant}.png"
+                    if path.is_file():
+                        return path, "image/png"
+                    break
+        for media_type, extension in _EXTENSIONS.items():
+            path = directory / f"{digest}.{extension}"
+            if path.is_file():
+                return path, media_type
+        return None
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        # Readers never see a partly written file
+        fd, temp = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def _resize(self, data: bytes) -> dict[int, bytes]:
+        from PIL import Image
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                if image.width * image.height > _MAX_PIXELS:
+                    raise InvalidLogo("Image is too large")
+                image.load()
+                image = image.convert("RGBA")
+        except (OSError, Image.DecompressionBombError):
+            raise InvalidLogo("Unreadable image")
+
+        variants = {}
+        for size in self.sizes:
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            variant.save(output, format="PNG", optimize=True)
+            variants[size] = output.getvalue()
+        return variants
+
+    def save_sync(self, data: bytes) -> str:
+        media_type = sniff(data)
+        if media_type is None:
+            raise InvalidLogo("Logo must be PNG, JPEG, GIF, WebP or ICO")
+        digest = hashlib.sha256(data).hexdigest()
+        directory = self._directory(digest)
+        original = directory / f"{digest}.{_EXTENSIONS[media_type]}"
+        if original.is_file():
+            return digest
+
+        variants = self._resize(data) if can_resize() else {}
+        directory.mkdir(parents=True, exist_ok=True)
+        for size, variant in variants.items():
+            self._write(directory / f"{digest}-{size}.png", variant)
+        # Written last: its presence means the logo is complete
+        self._write(original, data)
+        return digest
+
+    async def save(self, data: bytes) -> str:
+        """Store an upload (decoding and resizing off the event loop); returns its hash"""
+        return await asyncio.to_thread(self.save_sync, data)
+
+
+logo_store = LogoStore(settings.LOGO_DIR, settings.LOGO_SIZES)
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+from . import engine
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def run_maintenance() -> None:
+    """Refresh planner statistics and checkpoint the WAL.
+
+    Runs on the aiosqlite worker thread, so request handling carries on; a
+    PASSIVE checkpoint never waits for readers or writers. ``analysis_limit``
+    makes any ANALYZE that ``optimize`` decides on sample each index instead
+    of scanning it, so the write lock is held briefly however large the vault.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("PRAGMA analysis_limit = 400")
+        # 0x10000: consider every table, not only those this connection queried
+        await conn.exec_driver_sql("PRAGMA optimize = 0x10002")
+        await conn.commit()
+        await conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+
+
+class MaintenanceTask:
+    """Runs ``run_maintenance`` every ``interval`` seconds in the background"""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop(), name="db-maintenance")
+
+    async def shutdown(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_maintenance()
+            except Exception:
+                logger.exception("Database maintenance failed")
+
+
+maintenance_task = MaintenanceTask(settings.DATABASE_MAINTENANCE_INTERVAL_SECONDS)
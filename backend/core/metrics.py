@@ -0,0 +1,288 @@
+"""Minimal Prometheus-style metrics: counters, gauges and histograms.
+
+Recording is a dict lookup, a bisect and a few integer adds under a lock, so
+it stays cheap enough to leave on under load. ``render()`` produces the
+Prometheus text exposition format served at ``/metrics``.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable
+
+from . import profiling
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+CRYPTO_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.01, 0.1,
+    0.5, 1.0, 2.5, 5.0,
+)
+
+_registry: list["_Metric"] = []
+_collectors: list[Callable[[], None]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self._samples())
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {value}"
+            for key, value in list(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {value}"
+            for key, value in list(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets=DEFAULT_BUCKETS,
+        profile: str | None = None,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # Also attribute observations to the profiled request under this name
+        self.profile = profile
+        # Per label set: a count per bucket (+Inf last), then sum, then count
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+        if self.profile is not None:
+            profiling.record(self.profile, value)
+
+    def time(self, *labels):
+        """Decorator recording the duration of each call"""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labels)
+
+            return wrapper
+
+        return decorator
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+def collector(func: Callable[[], None]) -> Callable[[], None]:
+    """Register a function that refreshes gauges right before each scrape"""
+    _collectors.append(func)
+    return func
+
+
+def render() -> str:
+    for refresh in _collectors:
+        try:
+            refresh()
+        except Exception:
+            pass
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# HTTP
+http_requests = Counter(
+    "http_requests_total", "Requests served", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency", ("method", "route")
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests currently being served")
+
+# Database
+db_queries = Counter("db_queries_total", "SQL statements executed", ("operation",))
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ("operation",)
+)
+db_pool = Gauge("db_pool_connections", "Connection pool state", ("state",))
+
+# Crypto
+crypto_duration = Histogram(
+    "crypto_operation_duration_seconds",
+    "Time spent hashing, verifying, encrypting and decrypting",
+    ("operation",),
+    buckets=CRYPTO_BUCKETS,
+    profile="crypto",
+)
+
+# Admission control
+admission_decisions = Counter(
+    "admission_decisions_total",
+    "Requests admitted or rejected (queue_full, client_limit, timeout)",
+    ("limiter", "decision"),
+)
+admission_state = Gauge(
+    "admission_requests", "Requests running or waiting for a slot", ("limiter", "state")
+)
+
+# Background services
+service_gauge = Gauge("service_queue_depth", "Work waiting in background services", ("service",))
+totp_subscribers = Gauge("totp_stream_subscribers", "Open TOTP event streams")
+
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def instrument_engine(sync_engine) -> None:
+    """Count and time every SQL statement run through the engine"""
+    from sqlalchemy import event
+
+    # The start time lives on the execution context, not the pooled
+    # connection: a failed statement never reaches after_cursor_execute
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        operation = statement.lstrip()[:6].upper()
+        if operation not in _OPERATIONS:
+            operation = "OTHER"
+        db_queries.inc(operation)
+        db_query_duration.observe(time.perf_counter() - started, operation)
+
+
+def _route_template(scope) -> str:
+    """Full path template of the matched route, including router prefixes"""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # Routes of included routers only know their own path; recover the
+    # static prefix by finding where the route's pattern starts matching
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for index, char in enumerate(path):
+            if char == "/" and index and regex.match(path[index:]):
+                return path[:index] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and concurrency.
+
+    Requests are labelled with the route template (``/passwords/{password_id}``)
+    rather than the raw path so that the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            path = _route_template(scope)
+            method = scope["method"]
+            http_requests.inc(method, path, str(status_code))
+            http_request_duration.observe(time.perf_counter() - started, method, path)
@@ -0,0 +1,223 @@
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Connection, inspect, text
+
+from . import engine
+
+
+# Migrations must be idempotent: a fresh database already gets the current
+# schema from ``Base.metadata.create_all`` before they run.
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = []
+
+
+def migration(version: int, name: str):
+    """Register a schema migration under a unique, increasing version"""
+
+    def decorator(func: Callable[[Connection], None]):
+        if any(v == version for v, _, _ in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+
+    return decorator
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    columns = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+@migration(1, "index passwords by owner and users by email")
+def _index_owner_and_email(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_passwords_user_id_id "
+            "ON passwords (user_id, id)"
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_email ON users (email)"))
+
+
+@migration(2, "full-text search index over non-secret entry fields")
+def _passwords_fts(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS passwords_fts USING fts5("
+            "title, email, username, user_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    )
+    conn.execute(
+        text(
+            "INSERT INTO passwords_fts (rowid, title, email, username, user_id) "
+            "SELECT id, title, email, coalesce(username, ''), user_id FROM passwords "
+            "WHERE id NOT IN (SELECT rowid FROM passwords_fts)"
+        )
+    )
+
+
+@migration(3, "progress table for resumable key rotation")
+def _key_rotation_state(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS key_rotation_state ("
+            "key_fingerprint TEXT PRIMARY KEY, last_id INTEGER NOT NULL DEFAULT 0, "
+            "rotated INTEGER NOT NULL DEFAULT 0, started_at TEXT NOT NULL, "
+            "updated_at TEXT NOT NULL, finished_at TEXT)"
+        )
+    )
+
+
+@migration(4, "per-user vault version for conditional requests")
+def _vault_version(conn: Connection) -> None:
+    add_column(conn, "users", "vault_version", "INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(5, "change sequence and tombstones for delta sync")
+def _delta_sync(conn: Connection) -> None:
+    add_column(conn, "passwords", "updated_at", "DATETIME")
+    add_column(conn, "passwords", "change_seq", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_passwords_user_id_change_seq "
+            "ON passwords (user_id, change_seq)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS password_tombstones ("
+            "password_id INTEGER PRIMARY KEY, "
+            "user_id INTEGER NOT NULL REFERENCES users (id), "
+            "change_seq INTEGER NOT NULL, deleted_at DATETIME NOT NULL)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_password_tombstones_user_id_change_seq "
+            "ON password_tombstones (user_id, change_seq)"
+        )
+    )
+    # Existing entries become one change at a fresh version, so syncing
+    # from any earlier cursor picks them up
+    conn.execute(
+        text(
+            "UPDATE users SET vault_version = vault_version + 1 "
+            "WHERE id IN (SELECT user_id FROM passwords WHERE change_seq = 0)"
+        )
+    )
+    conn.execute(
+        text(
+            "UPDATE passwords SET change_seq = "
+            "(SELECT vault_version FROM users WHERE users.id = passwords.user_id) "
+            "WHERE change_seq = 0"
+        )
+    )
+
+
+@migration(6, "keyed password fingerprints for the reuse report")
+def _password_fingerprints(conn: Connection) -> None:
+    # Existing rows are filled in by the fingerprint backfill job
+    add_column(conn, "passwords", "password_fingerprint", "BLOB")
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_passwords_user_id_fingerprint "
+            "ON passwords (user_id, password_fingerprint)"
+        )
+    )
+
+
+@migration(7, "never reuse password ids")
+def _passwords_autoincrement(conn: Connection) -> None:
+    ddl = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'passwords'")
+    ).scalar_one()
+    if "AUTOINCREMENT" not in ddl.upper():
+        # SQLite cannot add AUTOINCREMENT in place: rebuild the table
+        from ..models import Password
+
+        columns = ", ".join(c["name"] for c in inspect(conn).get_columns("passwords"))
+        conn.execute(text("ALTER TABLE passwords RENAME TO passwords_old"))
+        for index in conn.execute(
+            text(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'passwords_old' AND sql IS NOT NULL"
+            )
+        ).scalars().all():
+            conn.execute(text(f'DROP INDEX "{index}"'))
+        Password.__table__.create(conn)
+        conn.execute(
+            text(f"INSERT INTO passwords ({columns}) SELECT {columns} FROM passwords_old")
+        )
+        conn.execute(text("DROP TABLE passwords_old"))
+
+    # Start after every id ever used, including deleted ones
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'passwords'"))
+    conn.execute(
+        text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'passwords', max("
+            "(SELECT coalesce(max(id), 0) FROM passwords), "
+            "(SELECT coalesce(max(password_id), 0) FROM password_tombstones))"
+        )
+    )
+    # Tombstones of ids that were already handed out again
+    conn.execute(
+        text("DELETE FROM password_tombstones WHERE password_id IN (SELECT id FROM passwords)")
+    )
+
+
+@migration(8, "revoked access tokens shared by all worker processes")
+def _revoked_tokens(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS revoked_tokens ("
+            "jti TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at "
+            "ON revoked_tokens (expires_at)"
+        )
+    )
+
+
+@migration(9, "drop key rotation state named by a plain hash of SECRET_KEY")
+def _rotation_state_key_ids(conn: Connection) -> None:
+    # Old targets were sha256(salt | iterations | SECRET_KEY) + ":cipher"; the
+    # next rotation run just starts over under the post-KDF key id
+    conn.execute(text("DELETE FROM key_rotation_state WHERE instr(key_fingerprint, ':') = 65"))
+
+
+def _apply_pending(conn: Connection) -> list[int]:
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT NOT NULL)"
+        )
+    )
+    applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    ran = []
+    for version, name, func in MIGRATIONS:
+        if version in applied:
+            continue
+        func(conn)
+        conn.execute(
+            text(
+                "INSERT INTO schema_migrations (version, name, applied_at) "
+                "VALUES (:version, :name, :applied_at)"
+            ),
+            {"version": version, "name": name, "applied_at": datetime.utcnow().isoformat()},
+        )
+        ran.append(version)
+    return ran
+
+
+async def run_migrations() -> list[int]:
+    """Apply pending migrations in order, each batch in one transaction"""
+    async with engine.begin() as conn:
+        return await conn.run_sync(_apply_pending)
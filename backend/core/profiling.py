@@ -0,0 +1,162 @@
+"""Opt-in per-request profiler (PROFILING_ENABLED).
+
+Every SQL statement, crypto call and the response serialization of a request
+are timed and attributed to it through a context variable. The breakdown is
+returned in a ``Server-Timing`` header and logged at DEBUG; requests that run
+the same statement shape more than PROFILING_REPEAT_THRESHOLD times (the
+typical N+1 lazy-load pattern) are logged as warnings.
+"""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from fastapi.routing import APIRoute
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EXPANDED_IN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only in parameters compare equal"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _EXPANDED_IN.sub("(?)", shape)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handler_finished: float | None = None
+        self.response_started: float | None = None
+        # name -> [count, seconds]
+        self.spans: dict[str, list] = {}
+        self.queries: dict[str, list] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        span = self.spans.setdefault(name, [0, 0.0])
+        span[0] += 1
+        span[1] += duration
+
+    def add_query(self, statement: str, duration: float) -> None:
+        self.add("db", duration)
+        query = self.queries.setdefault(statement_shape(statement), [0, 0.0])
+        query[0] += 1
+        query[1] += duration
+
+    def repeated_queries(self, threshold: int) -> list[tuple[str, int]]:
+        return [
+            (shape, count) for shape, (count, _) in self.queries.items() if count > threshold
+        ]
+
+    def breakdown(self) -> dict[str, tuple[int, float]]:
+        """Count and milliseconds per phase, measured up to the response start"""
+        end = self.response_started or time.perf_counter()
+        phases = {name: (count, seconds * 1000) for name, (count, seconds) in self.spans.items()}
+        if self.handler_finished is not None:
+            phases["serialize"] = (1, (end - self.handler_finished) * 1000)
+        phases["total"] = (1, (end - self.started) * 1000)
+        return phases
+
+    def server_timing(self) -> str:
+        entries = []
+        for name, (count, ms) in self.breakdown().items():
+            entry = f"{name};dur={ms:.2f}"
+            if name not in ("total", "serialize"):
+                entry += f';desc="{count}x"'
+            entries.append(entry)
+        repeated = self.repeated_queries(settings.PROFILING_REPEAT_THRESHOLD)
+        if repeated:
+            entries.append(f'n-plus-one;desc="{max(count for _, count in repeated)} repeats"')
+        return ", ".join(entries)
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def record(name: str, duration: float) -> None:
+    """Attribute ``duration`` seconds of work to the current request, if profiled"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, duration)
+
+
+def instrument_engine(sync_engine) -> None:
+    """Attribute every SQL statement to the request that ran it"""
+    from sqlalchemy import event
+
+    # Per execution context: a failed statement leaves nothing behind on the
+    # pooled connection
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            context._profile_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        started = getattr(context, "_profile_started", None)
+        if profile is not None and started is not None:
+            profile.add_query(statement, time.perf_counter() - started)
+
+
+class ProfiledRoute(APIRoute):
+    """Marks when the endpoint returns so serialization can be timed separately"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **values):
+            try:
+                return await endpoint(*args, **values)
+            finally:
+                profile = _current.get()
+                if profile is not None:
+                    profile.handler_finished = time.perf_counter()
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.response_started = time.perf_counter()
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._log(scope, profile)
+
+    @staticmethod
+    def _log(scope, profile: RequestProfile) -> None:
+        request = f"{scope['method']} {scope['path']}"
+        repeated = profile.repeated_queries(settings.PROFILING_REPEAT_THRESHOLD)
+        for shape, count in repeated:
+            logger.warning("%s ran the same query %d times: %s", request, count, shape)
+        if logger.isEnabledFor(logging.DEBUG):
+            phases = ", ".join(
+                f"{name}={ms:.2f}ms/{count}" for name, (count, ms) in profile.breakdown().items()
+            )
+            logger.debug("%s %s", request, phases)
@@ -1,50 +1,279 @@
-from passlib.context import CryptContext
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.backends import default_backend
-from .config import settings
 import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+
+from .config import settings
+from .metrics import crypto_duration
+
+logger = logging.getLogger(__name__)
+
+# Heavy crypto modules (passlib/argon2, cryptography) are imported on first
+# use so that importing the app, spawning workers and running scripts stays
+# cheap. Nothing here does real work at import time.
+
+KDF_SALT = b"static_salt_change_in_production"  # Use unique salt per app
+KDF_ITERATIONS = 100000
+
+_key_lock = threading.Lock()
 
-# Password hashing context (for user passwords)
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    argon2__default_rounds=4,  # ~1 second on modern CPU
-    deprecated="auto",
-)
+
+@lru_cache(maxsize=1)
+def _pwd_context():
+    """Password hashing context (for user passwords)"""
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["argon2"],
+        argon2__default_rounds=4,  # ~1 second on modern CPU
+        deprecated="auto",
+    )
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
+
+
+# Encryption for stored passwords. Nothing that is persisted (the key file,
+# key_rotation_state) may hold a cheap function of SECRET_KEY: that would be
+# an offline oracle for guessing it that skips the KDF.
+def _read_key_file(path: str) -> list[bytes]:
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return []
+    keys = cached.get("keys")
+    if not isinstance(keys, list) or not all(isinstance(key, str) for key in keys):
+        return []
+    return [key.encode() for key in keys]
+
 
+def _write_key_file(path: str, keys: list[bytes]) -> None:
+    """Write the derived keys readable by the owner only (best effort)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"keys": [key.decode() for key in keys]}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
 
-# Encryption for stored passwords
-def get_fernet_key() -> bytes:
-    """Derive a Fernet key from the SECRET_KEY"""
+
+def get_fernet_key(secret_key: str | None = None) -> bytes:
+    """Derive a Fernet key from the SECRET_KEY (or a previous one)"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    if secret_key is None:
+        secret_key = settings.SECRET_KEY
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
-        salt=b"static_salt_change_in_production",  # Use unique salt per app
-        iterations=100000,
-        backend=default_backend(),
+        salt=KDF_SALT,
+        iterations=KDF_ITERATIONS,
     )
-    key = base64.urlsafe_b64encode(kdf.derive(settings.SECRET_KEY.encode()))
+    key = base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
     return key
 
 
-_fernet = Fernet(get_fernet_key())
+def _verify_key_file(path: str, secret_keys: list[str], cached: list[bytes]) -> None:
+    """Re-derive the cached keys; replace the file (and keyring) if stale"""
+    global _keyring
+    derived = [get_fernet_key(secret) for secret in secret_keys]
+    if derived == cached:
+        return
+    logger.error(
+        "FERNET_KEY_FILE %s does not match SECRET_KEY/PREVIOUS_SECRET_KEYS; rewriting it", path
+    )
+    _write_key_file(path, derived)
+    with _key_lock:
+        # Stale keys stay readable for anything encrypted with them meanwhile
+        _keyring = _Keyring(derived + [key for key in cached if key not in derived])
+
+
+def _load_fernet_keys(secret_keys: list[str]) -> list[bytes]:
+    """Derived keys, in the order of ``secret_keys``.
+
+    The key file holds the derived keys only, nothing that would let a
+    secret be checked without the KDF, so it cannot say which secret a key
+    came from. A file with one key per secret is used straight away and
+    checked by re-deriving the keys in a background thread.
+    """
+    path = settings.FERNET_KEY_FILE
+    cached = _read_key_file(path) if path else []
+    if cached and len(cached) == len(secret_keys):
+        threading.Thread(
+            target=_verify_key_file,
+            args=(path, secret_keys, cached),
+            name="key-file-check",
+            daemon=True,
+        ).start()
+        return cached
+
+    keys = [get_fernet_key(secret) for secret in secret_keys]
+    if path:
+        _write_key_file(path, keys)
+    return keys
+
+
+def active_secret_keys() -> list[str]:
+    """Current SECRET_KEY first, then keys that are still accepted for reads"""
+    secrets = [settings.SECRET_KEY]
+    secrets += [s for s in settings.PREVIOUS_SECRET_KEYS if s not in secrets]
+    return secrets
+
+
+# Stored ciphertext formats. Legacy rows hold a Fernet token (text starting
+# with "gAAAA"); newer rows hold a binary envelope whose first byte is the
+# format version:
+#
+#     version (1) | key id (4) | nonce (12) | AEAD ciphertext + tag
+#
+# The version byte and key id are authenticated as associated data.
+CIPHER_VERSIONS = {"aesgcm": 1, "chacha20": 2}
+_NONCE_SIZE = 12
+_HEADER_SIZE = 1 + 4
+
+
+class _Keyring:
+    def __init__(self, fernet_keys: list[bytes]):
+        from cryptography.fernet import Fernet, MultiFernet
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+        from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+        self.fernet = MultiFernet([Fernet(key) for key in fernet_keys])
+        self.aead: dict[bytes, dict[int, object]] = {}
+        self.primary_key_id = b""
+        self.fingerprint_key = b""
+        for index, fernet_key in enumerate(fernet_keys):
+            raw = HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=None, info=b"localpass aead v1"
+            ).derive(base64.urlsafe_b64decode(fernet_key))
+            key_id = hashlib.sha256(raw).digest()[:4]
+            self.aead.setdefault(key_id, {1: AESGCM(raw), 2: ChaCha20Poly1305(raw)})
+            if index == 0:
+                self.primary_key_id = key_id
+                self.fingerprint_key = HKDF(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=None,
+                    info=b"localpass fingerprint v1",
+                ).derive(base64.urlsafe_b64decode(fernet_key))
+
+
+_keyring: _Keyring | None = None
+
+
+def _get_keyring() -> _Keyring:
+    global _keyring
+    if _keyring is None:
+        with _key_lock:
+            if _keyring is None:
+                _keyring = _Keyring(_load_fernet_keys(active_secret_keys()))
+    return _keyring
+
+
+def get_fernet():
+    """The process-wide MultiFernet, derived on first use.
+
+    Encrypts with the current key and decrypts with any active key, so
+    rows written under a previous SECRET_KEY stay readable while they are
+    being re-encrypted.
+    """
+    return _get_keyring().fernet
+
+
+@crypto_duration.time("encrypt")
+def encrypt_password(password: str) -> str | bytes:
+    """Encrypt a password for storage (reversible) in the configured format"""
+    keyring = _get_keyring()
+    version = CIPHER_VERSIONS.get(settings.CIPHER)
+    if version is None:
+        return keyring.fernet.encrypt(password.encode()).decode()
+
+    header = bytes([version]) + keyring.primary_key_id
+    nonce = os.urandom(_NONCE_SIZE)
+    cipher = keyring.aead[keyring.primary_key_id][version]
+    return header + nonce + cipher.encrypt(nonce, password.encode(), header)
+
+
+@crypto_duration.time("decrypt")
+def decrypt_password(encrypted_password: str | bytes) -> str:
+    """Decrypt a stored password in any supported format"""
+    keyring = _get_keyring()
+    if isinstance(encrypted_password, str):
+        return keyring.fernet.decrypt(encrypted_password.encode()).decode()
+
+    version = encrypted_password[0] if encrypted_password else None
+    if version not in (1, 2):
+        # A Fernet token that was stored as bytes
+        return keyring.fernet.decrypt(encrypted_password).decode()
+
+    key_id = encrypted_password[1:_HEADER_SIZE]
+    ciphers = keyring.aead.get(key_id)
+    if ciphers is None:
+        raise ValueError("Password was encrypted with an unknown key")
+    nonce = encrypted_password[_HEADER_SIZE : _HEADER_SIZE + _NONCE_SIZE]
+    return (
+        ciphers[version]
+        .decrypt(
+            nonce,
+            encrypted_password[_HEADER_SIZE + _NONCE_SIZE :],
+            encrypted_password[:_HEADER_SIZE],
+        )
+        .decode()
+    )
+
+
+# Password fingerprints: key id (4) | HMAC-SHA256(user id | password)[:16].
+# Equal passwords of one user get equal fingerprints, so reuse is found with
+# a GROUP BY instead of decrypting the vault. The user id keeps different
+# users' fingerprints apart; the key id marks fingerprints to recompute
+# after a SECRET_KEY change.
+FINGERPRINT_SIZE = 4 + 16
+
+
+def current_key_id() -> bytes:
+    """Id of the current key, derived after the KDF so it reveals nothing"""
+    return _get_keyring().primary_key_id
+
+
+def fingerprint_key_id() -> bytes:
+    """Key id prefix of fingerprints made with the current key"""
+    return current_key_id()
+
+
+def fingerprint_password(user_id: int, password: str) -> bytes:
+    keyring = _get_keyring()
+    mac = hmac.new(
+        keyring.fingerprint_key,
+        user_id.to_bytes(8, "big") + password.encode(),
+        hashlib.sha256,
+    )
+    return keyring.primary_key_id + mac.digest()[:16]
 
 
-def encrypt_password(password: str) -> str:
-    """Encrypt a password for storage (reversible)"""
-    return _fernet.encrypt(password.encode()).decode()
+def warm_up() -> None:
+    """Derive the keys and load the hashing backend ahead of the first request"""
+    _get_keyring()
+    _pwd_context()
 
 
-def decrypt_password(encrypted_password: str) -> str:
-    """Decrypt a stored password"""
-    return _fernet.decrypt(encrypted_password.encode()).decode()
+def rotate_encrypted_password(encrypted_password: str | bytes) -> str | bytes:
+    """Re-encrypt a stored password under the current key and format"""
+    return encrypt_password(decrypt_password(encrypted_password))
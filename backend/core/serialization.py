@@ -0,0 +1,82 @@
+"""Response encoders for the hot listing/export paths.
+
+Rows are already shaped by ``decrypt_password_for_response``, so routes that
+return many of them hand the dicts straight to an encoder instead of having
+FastAPI validate them against the response model and encode them again.
+orjson and msgpack are optional (``pip install orjson msgpack``); without
+orjson the stdlib encoder is used, without msgpack only JSON is offered.
+"""
+
+import json
+from datetime import datetime
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional format
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps_json(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+def dumps_msgpack(content) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+def ndjson_line(entry: dict) -> bytes:
+    return dumps_json(entry) + b"\n"
+
+
+def negotiate(accept: str | None) -> str:
+    """Pick JSON, NDJSON or MessagePack from an Accept header"""
+    if not accept:
+        return JSON_MEDIA_TYPE
+    # Explicit q=0 exclusions are rare enough for a substring check
+    if NDJSON_MEDIA_TYPE in accept:
+        return NDJSON_MEDIA_TYPE
+    if msgpack is not None and any(alias in accept for alias in _MSGPACK_ALIASES):
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with orjson when available, without validation"""
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return dumps_msgpack(content)
+
+
+def encoded_response(content, media_type: str, **kwargs) -> Response:
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return MsgPackResponse(content, **kwargs)
+    return FastJSONResponse(content, **kwargs)
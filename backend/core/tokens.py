@@ -0,0 +1,195 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+import uuid
+
+from sqlalchemy import text
+
+from . import AsyncSessionLocal
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidToken(Exception):
+    """Raised when an access token is malformed, forged, expired or revoked"""
+
+
+_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(signing_input: bytes) -> str:
+    digest = hmac.new(settings.SECRET_KEY.encode(), signing_input, hashlib.sha256)
+    return _b64encode(digest.digest())
+
+
+class TokenDenylist:
+    """In-process set of revoked token ids, forgotten once they expire anyway.
+
+    Revocations are also written to the ``revoked_tokens`` table, which
+    other worker processes copy in with ``DenylistSync``, so checking a token
+    never waits on the database.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._prune()
+        self._revoked[jti] = expires_at
+
+    def update(self, revoked: list[tuple[str, float]]) -> None:
+        self._prune()
+        self._revoked.update(revoked)
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def _prune(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp < now]:
+            del self._revoked[jti]
+
+
+denylist = TokenDenylist()
+
+
+def create_access_token(user_id: int, expires_in: int | None = None) -> str:
+    """Issue a signed HS256 token carrying the user id"""
+    if settings.ALGORITHM != "HS256":
+        raise ValueError(f"Unsupported token algorithm: {settings.ALGORITHM}")
+
+    now = int(time.time())
+    if expires_in is None:
+        expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    payload = {
+        "sub": str(user_id),
+        "iat": now,
+        "exp": now + expires_in,
+        "jti": uuid.uuid4().hex,
+    }
+    signing_input = (
+        _b64encode(json.dumps(_HEADER, separators=(",", ":")).encode())
+        + "."
+        + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    )
+    return signing_input + "." + _sign(signing_input.encode())
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify a token in memory and return its payload"""
+    try:
+        header_b64, payload_b64, signature = token.split(".")
+    except ValueError:
+        raise InvalidToken("Malformed token")
+
+    expected = _sign(f"{header_b64}.{payload_b64}".encode())
+    if not hmac.compare_digest(signature, expected):
+        raise InvalidToken("Bad signature")
+
+    try:
+        header = json.loads(_b64decode(header_b64))
+        payload = json.loads(_b64decode(payload_b64))
+    except ValueError:
+        raise InvalidToken("Malformed token")
+
+    if header.get("alg") != "HS256":
+        raise InvalidToken("Unexpected algorithm")
+    if payload.get("exp", 0) < time.time():
+        raise InvalidToken("Token expired")
+    if payload.get("jti") in denylist:
+        raise InvalidToken("Token revoked")
+    return payload
+
+
+async def revoke_access_token(token: str) -> None:
+    payload = decode_access_token(token)
+    denylist.add(payload["jti"], payload["exp"])
+    async with AsyncSessionLocal() as db:
+        # The newest row stays: DenylistSync reads rows by increasing rowid,
+        # and an emptied table would hand out old rowids again
+        await db.execute(
+            text(
+                "DELETE FROM revoked_tokens WHERE expires_at < :now "
+                "AND rowid < (SELECT max(rowid) FROM revoked_tokens)"
+            ),
+            {"now": time.time()},
+        )
+        await db.execute(
+            text(
+                "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) "
+                "VALUES (:jti, :expires_at)"
+            ),
+            {"jti": payload["jti"], "expires_at": payload["exp"]},
+        )
+        await db.commit()
+
+
+class DenylistSync:
+    """Copies revocations made by other worker processes into ``denylist``.
+
+    Polls ``revoked_tokens`` for rows added since the last poll, so a token
+    revoked on one worker is rejected by all of them within ``interval``
+    seconds. Only runs with TOKEN_DENYLIST_SHARED.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last_rowid = 0
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> int:
+        """Copy in new revocations; returns how many rows were read"""
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    text(
+                        "SELECT rowid, jti, expires_at FROM revoked_tokens "
+                        "WHERE rowid > :last_rowid ORDER BY rowid"
+                    ),
+                    {"last_rowid": self._last_rowid},
+                )
+            ).all()
+        if rows:
+            now = time.time()
+            denylist.update([(row.jti, row.expires_at) for row in rows if row.expires_at >= now])
+            self._last_rowid = rows[-1].rowid
+        return len(rows)
+
+    def start(self) -> None:
+        if not settings.TOKEN_DENYLIST_SHARED or self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop(), name="token-denylist-sync")
+
+    async def shutdown(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Token denylist refresh failed")
+            await asyncio.sleep(self.interval)
+
+
+denylist_sync = DenylistSync(settings.TOKEN_DENYLIST_REFRESH_SECONDS)
@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+
+from .config import settings
+
+DEFAULT_PERIOD = 30
+
+
+@lru_cache(maxsize=1024)
+def _totp_for(fa_code: str):
+    """Build a TOTP from an otpauth:// URI or a bare Base32 secret"""
+    import pyotp
+
+    fa_code = fa_code.strip()
+    if fa_code.startswith("otpauth://"):
+        return pyotp.parse_uri(fa_code)
+    return pyotp.TOTP(fa_code)
+
+
+class TotpCache:
+    """Bounded LRU of codes keyed by (fa_code, time step).
+
+    A code only changes once per period, so every request in the same
+    window after the first one costs a dict lookup instead of an HMAC.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._codes: OrderedDict[tuple[str, int], str] = OrderedDict()
+
+    def code(self, fa_code: str, now: float | None = None) -> tuple[str, int]:
+        """Current code and its period in seconds"""
+        now = time.time() if now is None else now
+        totp = _totp_for(fa_code)
+        key = (fa_code, int(now // totp.interval))
+
+        code = self._codes.get(key)
+        if code is None:
+            code = totp.at(now)
+            self._codes[key] = code
+            if len(self._codes) > self.max_size:
+                self._codes.popitem(last=False)
+        else:
+            self._codes.move_to_end(key)
+        return code, totp.interval
+
+
+def time_remaining(period: int = DEFAULT_PERIOD, now: float | None = None) -> int:
+    now = time.time() if now is None else now
+    return period - int(now % period)
+
+
+totp_cache = TotpCache(settings.TOTP_CACHE_SIZE)
+
+
+def codes_payload(entries: list[tuple[int, str, str]], now: float | None = None) -> dict:
+    """Current codes for (id, title, fa_code) entries with a shared countdown"""
+    now = time.time() if now is None else now
+    codes = []
+    for password_id, title, fa_code in entries:
+        try:
+            code, period = totp_cache.code(fa_code, now)
+        except (ValueError, TypeError):
+            # Malformed secrets stay listed so the client can flag them
+            code, period = None, DEFAULT_PERIOD
+        entry = {"id": password_id, "title": title, "code": code}
+        if period != DEFAULT_PERIOD:
+            entry["period"] = period
+            entry["time_remaining_seconds"] = time_remaining(period, now)
+        codes.append(entry)
+
+    remaining = time_remaining(DEFAULT_PERIOD, now)
+    return {
+        "codes": codes,
+        "period": DEFAULT_PERIOD,
+        "time_remaining_seconds": remaining,
+        "next_request_in_ms": remaining * 1000,
+        "generated_at": datetime.now().isoformat(),
+    }
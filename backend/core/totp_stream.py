@@ -0,0 +1,129 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+
+from . import AsyncSessionLocal
+from .config import settings
+from .totp import DEFAULT_PERIOD, codes_payload
+
+logger = logging.getLogger(__name__)
+
+# Tick slightly after the boundary so every code has already rolled over
+_TICK_DELAY = 0.05
+
+
+class TooManySubscribers(Exception):
+    """Raised when the worker already holds the maximum number of streams"""
+
+
+class Subscription:
+    """One open stream. Holds at most the latest undelivered payload.
+
+    A slow client never makes the broadcaster wait: if it has not read the
+    previous payload yet, that stale payload is replaced by the fresh one.
+    """
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.dropped = 0
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=1)
+
+    def push(self, payload: str) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(payload)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+
+async def _load_entries(user_ids: list[int]) -> dict[int, list[tuple[int, str, str]]]:
+    from ..crud import password as password_crud
+
+    async with AsyncSessionLocal() as db:
+        return await password_crud.get_totp_entries_for_users(db, user_ids)
+
+
+class TotpBroadcaster:
+    """Pushes fresh TOTP codes to every open stream at each period boundary.
+
+    One scheduler task wakes once per period, loads the 2FA entries of all
+    subscribed users in a single query, serializes each user's payload once
+    and fans it out to all of that user's streams.
+    """
+
+    def __init__(self, max_subscribers: int, period: int = DEFAULT_PERIOD, load_entries=_load_entries):
+        self.max_subscribers = max_subscribers
+        self.period = period
+        self._load_entries = load_entries
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._count = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def subscribe(self, user_id: int) -> Subscription:
+        if self._count >= self.max_subscribers:
+            raise TooManySubscribers("Too many open TOTP streams")
+        subscription = Subscription(user_id)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        self._count += 1
+        if self._task is None:
+            # A fresh context: the task serves every subscriber, so it must not
+            # inherit this request's (e.g. its profile); the lifespan stops it
+            self._task = asyncio.create_task(
+                self._run(), name="totp-broadcaster", context=contextvars.Context()
+            )
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if not subscriptions or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        self._count -= 1
+        if not subscriptions:
+            del self._subscribers[subscription.user_id]
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def shutdown(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def payload_for(self, user_id: int, now: float | None = None) -> str:
+        entries = await self._load_entries([user_id])
+        return json.dumps(codes_payload(entries[user_id], now))
+
+    async def tick(self, now: float | None = None) -> None:
+        """Send current codes to every subscriber"""
+        if not self._subscribers:
+            return
+        now = time.time() if now is None else now
+        entries = await self._load_entries(list(self._subscribers))
+        for user_id, subscriptions in list(self._subscribers.items()):
+            payload = json.dumps(codes_payload(entries.get(user_id, []), now))
+            for subscription in list(subscriptions):
+                subscription.push(payload)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.period - time.time() % self.period + _TICK_DELAY)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("TOTP broadcast tick failed")
+
+
+totp_broadcaster = TotpBroadcaster(settings.TOTP_STREAM_MAX_SUBSCRIBERS)
@@ -1,12 +1,25 @@
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from ..models import Password
-from ..schemas.password import PasswordCreate, PasswordUpdate
-from ..core.security import encrypt_password, decrypt_password
+from sqlalchemy import delete, func, insert, or_, select, text, update
+from sqlalchemy.exc import DBAPIError
+from ..models import Password, PasswordTombstone, User
+from ..schemas.password import (
+    BatchCreate,
+    BatchDelete,
+    BatchOperation,
+    BatchUpdate,
+    PasswordCreate,
+    PasswordUpdate,
+)
+from ..core.security import decrypt_password, encrypt_password, fingerprint_password
+from ..core.config import settings
+from ..core.write_batcher import write_batcher
 
-import pyotp
+import asyncio
 import urllib
+from datetime import datetime
 import base64
+from typing import AsyncIterator
 
 
 async def verify_facode(fa_code: str) -> bool:
@@ -42,34 +55,338 @@ async def get_password(db: AsyncSession, password_id: int) -> Password | None:
     return result.scalar_one_or_none()
 
 
-async def get_user_passwords(db: AsyncSession, user_id: int) -> list[Password] | None:
-    result = await db.execute(select(Password).where(Password.user_id == user_id))
+async def get_vault_version(db: AsyncSession, user_id: int) -> int | None:
+    """Current version of a user's vault (None if the user does not exist)"""
+    result = await db.execute(select(User.vault_version).where(User.id == user_id))
+    return result.scalar_one_or_none()
+
+
+async def _bump_vault_version(db: AsyncSession, user_id: int) -> int:
+    """Advance the user's vault version; the new value is the change sequence"""
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(vault_version=User.vault_version + 1)
+        .returning(User.vault_version)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one()
+
+
+async def _add_tombstones(
+    db: AsyncSession, user_id: int, password_ids: list[int], change_seq: int
+) -> None:
+    # REPLACE: SQLite may hand a deleted id out again
+    await db.execute(
+        insert(PasswordTombstone).prefix_with("OR REPLACE"),
+        [
+            {
+                "password_id": password_id,
+                "user_id": user_id,
+                "change_seq": change_seq,
+                "deleted_at": datetime.utcnow(),
+            }
+            for password_id in password_ids
+        ],
+    )
+
+
+async def get_user_passwords(
+    db: AsyncSession, user_id: int, limit: int | None = None, after_id: int | None = None
+) -> list[Password] | None:
+    """Keyset page of a user's passwords ordered by id (all of them if no limit)"""
+    query = select(Password).where(Password.user_id == user_id)
+    if after_id is not None:
+        query = query.where(Password.id > after_id)
+    query = query.order_by(Password.id)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
     return list(result.scalars().all())
 
 
-async def create_password(
-    db: AsyncSession, password: PasswordCreate, user_id: int
-) -> Password | None:
-    if not verify_facode(password.fa_code):
+async def stream_user_passwords(
+    db: AsyncSession, user_id: int, after_id: int | None = None, batch_size: int = 500
+) -> AsyncIterator[Password]:
+    """Yield a user's passwords one by one without loading the whole vault"""
+    query = select(Password).where(Password.user_id == user_id)
+    if after_id is not None:
+        query = query.where(Password.id > after_id)
+    query = query.order_by(Password.id).execution_options(yield_per=batch_size)
+    result = await db.stream_scalars(query)
+    async for password in result:
+        yield password
+        # Rows already emitted are not needed by the session anymore
+        db.expunge(password)
+
+
+async def get_user_totp_entries(db: AsyncSession, user_id: int) -> list[tuple[int, str, str]]:
+    """(id, title, fa_code) of a user's 2FA entries, without loading secrets"""
+    result = await db.execute(
+        select(Password.id, Password.title, Password.fa_code)
+        .where(Password.user_id == user_id, Password.fa_code.is_not(None))
+        .order_by(Password.id)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def get_user_encrypted_passwords(
+    db: AsyncSession, user_id: int
+) -> list[tuple[int, str, str | bytes]]:
+    """(id, title, encrypted password) of every entry, left encrypted"""
+    result = await db.execute(
+        select(Password.id, Password.title, Password.encrypted_password)
+        .where(Password.user_id == user_id)
+        .order_by(Password.id)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def get_reused_passwords(
+    db: AsyncSession, user_id: int, key_id: bytes
+) -> tuple[list[list[tuple[int, str]]], int, int]:
+    """Groups of (id, title) sharing a password, from fingerprints alone.
+
+    Also returns how many entries were compared and how many still wait for
+    a fingerprint under the current key (``key_id``).
+    """
+    fingerprint = Password.password_fingerprint
+    reused = (
+        select(fingerprint)
+        .where(Password.user_id == user_id, fingerprint.is_not(None))
+        .group_by(fingerprint)
+        .having(func.count() > 1)
+    )
+    result = await db.execute(
+        select(Password.id, Password.title, fingerprint)
+        .where(Password.user_id == user_id, fingerprint.in_(reused))
+        .order_by(fingerprint, Password.id)
+    )
+    groups: dict[bytes, list[tuple[int, str]]] = {}
+    for password_id, title, value in result.all():
+        groups.setdefault(value, []).append((password_id, title))
+
+    checked, pending = (
+        await db.execute(
+            select(
+                func.count(),
+                func.count().filter(
+                    or_(fingerprint.is_(None), func.substr(fingerprint, 1, 4) != key_id)
+                ),
+            ).where(Password.user_id == user_id)
+        )
+    ).one()
+    return list(groups.values()), checked - pending, pending
+
+
+async def get_totp_entries_for_users(
+    db: AsyncSession, user_ids: list[int], chunk_size: int = 500
+) -> dict[int, list[tuple[int, str, str]]]:
+    """2FA entries of many users at once, grouped by user id"""
+    entries: dict[int, list[tuple[int, str, str]]] = {user_id: [] for user_id in user_ids}
+    for start in range(0, len(user_ids), chunk_size):
+        result = await db.execute(
+            select(Password.user_id, Password.id, Password.title, Password.fa_code)
+            .where(
+                Password.user_id.in_(user_ids[start : start + chunk_size]),
+                Password.fa_code.is_not(None),
+            )
+            .order_by(Password.user_id, Password.id)
+        )
+        for user_id, password_id, title, fa_code in result.all():
+            entries[user_id].append((password_id, title, fa_code))
+    return entries
+
+
+def encode_cursor(password_id: int) -> str:
+    """Opaque pagination cursor for the row with this id"""
+    return base64.urlsafe_b64encode(f"id:{password_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, value = raw.split(":", 1)
+        if prefix != "id":
+            raise ValueError(cursor)
+        return int(value)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def encode_sync_cursor(change_seq: int, after_id: int | None = None) -> str:
+    """Opaque delta-sync cursor: every change up to ``change_seq`` was seen,
+    or, with ``after_id``, those at ``change_seq`` up to that entry id"""
+    raw = f"seq:{change_seq}" if after_id is None else f"seq:{change_seq}:{after_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> tuple[int, int | None]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, *values = raw.split(":")
+        if prefix != "seq" or len(values) not in (1, 2):
+            raise ValueError(cursor)
+        return int(values[0]), int(values[1]) if len(values) == 2 else None
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+async def get_changes(
+    db: AsyncSession,
+    user_id: int,
+    since: int,
+    after_id: int | None,
+    limit: int,
+    include_deleted: bool = True,
+) -> tuple[list[Password], list[int], tuple[int, int] | None]:
+    """Entries changed and ids deleted after a sync position, in change order.
+
+    Returns the changed entries, the deleted ids and, when ``limit`` cut the
+    page short, the ``(change_seq, id)`` position to continue from.
+    """
+
+    def after_position(id_column: str) -> str:
+        if after_id is None:
+            return "change_seq > :since"
+        return f"(change_seq > :since OR (change_seq = :since AND {id_column} > :after_id))"
+
+    statement = (
+        "SELECT change_seq, id, 0 AS deleted FROM passwords "
+        f"WHERE user_id = :user_id AND {after_position('id')} "
+    )
+    if include_deleted:
+        statement += (
+            "UNION ALL "
+            "SELECT change_seq, password_id AS id, 1 AS deleted FROM password_tombstones "
+            f"WHERE user_id = :user_id AND {after_position('password_id')} "
+        )
+    statement = text(statement + "ORDER BY change_seq, id LIMIT :limit")
+    rows = (
+        await db.execute(
+            statement,
+            {"user_id": user_id, "since": since, "after_id": after_id, "limit": limit + 1},
+        )
+    ).all()
+
+    next_position = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_position = (rows[-1].change_seq, rows[-1].id)
+
+    changed_ids = [row.id for row in rows if not row.deleted]
+    deleted = [row.id for row in rows if row.deleted]
+    changed = []
+    if changed_ids:
+        result = await db.execute(select(Password).where(Password.id.in_(changed_ids)))
+        by_id = {password.id: password for password in result.scalars()}
+        changed = [by_id[password_id] for password_id in changed_ids]
+    return changed, deleted, next_position
+
+
+async def _index_for_search(db: AsyncSession, password: Password) -> None:
+    """Mirror the non-secret fields of an entry into the FTS index"""
+    await db.execute(
+        text(
+            "INSERT OR REPLACE INTO passwords_fts (rowid, title, email, username, user_id) "
+            "VALUES (:id, :title, :email, :username, :user_id)"
+        ),
+        {
+            "id": password.id,
+            "title": password.title,
+            "email": password.email,
+            "username": password.username or "",
+            "user_id": password.user_id,
+        },
+    )
+
+
+async def _index_many_for_search(db: AsyncSession, rows: list[dict]) -> None:
+    """Bulk version of ``_index_for_search`` for rows given as column dicts"""
+    if not rows:
+        return
+    await db.execute(
+        text(
+            "INSERT OR REPLACE INTO passwords_fts (rowid, title, email, username, user_id) "
+            "VALUES (:id, :title, :email, :username, :user_id)"
+        ),
+        [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "email": row["email"],
+                "username": row["username"] or "",
+                "user_id": row["user_id"],
+            }
+            for row in rows
+        ],
+    )
+
+
+async def _unindex_for_search(db: AsyncSession, password_id: int) -> None:
+    await db.execute(
+        text("DELETE FROM passwords_fts WHERE rowid = :id"), {"id": password_id}
+    )
+
+
+def build_match_query(query: str) -> str | None:
+    """Turn user input into an FTS5 query: every term must match as a prefix"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    terms = [term for term in terms if term.strip('"')]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+async def search_passwords(
+    db: AsyncSession, user_id: int, query: str, limit: int = 20
+) -> list[Password]:
+    """Best matches for ``query`` among a user's entries, ranked by bm25"""
+    match = build_match_query(query)
+    if match is None:
+        return []
+    statement = text(
+        "SELECT passwords.* FROM passwords_fts "
+        "JOIN passwords ON passwords.id = passwords_fts.rowid "
+        "WHERE passwords_fts MATCH :match AND passwords_fts.user_id = :user_id "
+        "ORDER BY passwords_fts.rank LIMIT :limit"
+    )
+    result = await db.execute(
+        select(Password).from_statement(statement),
+        {"match": match, "user_id": user_id, "limit": limit},
+    )
+    return list(result.scalars().all())
+
+
+async def create_password(password: PasswordCreate, user_id: int) -> Password | None:
+    """Insert an entry through the write batcher, in its own transaction"""
+    if password.fa_code and not await verify_facode(password.fa_code):
         return None
         
     # Encrypt the password before storing
     encrypted_pwd = encrypt_password(password.password)
+    fingerprint = fingerprint_password(user_id, password.password)
     
     
-    db_password = Password(
-        user_id=user_id,
-        title=password.title,
-        logo=password.logo,
-        email=password.email,
-        username=password.username,
-        encrypted_password=encrypted_pwd,
-        fa_code=password.fa_code,
-    )
-    db.add(db_password)
-    await db.commit()
-    await db.refresh(db_password)
-    return db_password
+    async def write(session: AsyncSession) -> Password:
+        db_password = Password(
+            user_id=user_id,
+            title=password.title,
+            logo=password.logo,
+            email=password.email,
+            username=password.username,
+            encrypted_password=encrypted_pwd,
+            password_fingerprint=fingerprint,
+            fa_code=password.fa_code,
+            change_seq=await _bump_vault_version(session, user_id),
+        )
+        session.add(db_password)
+        await session.flush()
+        await _index_for_search(session, db_password)
+        return db_password
+
+    # Committed together with other concurrent writes
+    return await write_batcher.submit(write)
 
 
 def extract_totp_secret(uri_or_secret: str) -> str:
@@ -90,52 +407,369 @@ def extract_totp_secret(uri_or_secret: str) -> str:
     return cleaned
     
 async def update_password(
-    db: AsyncSession, password_id: int, password: PasswordUpdate, user_id: int, fa_code: str | None = None
+    password_id: int, password: PasswordUpdate, user_id: int, fa_code: str | None = None
 ) -> Password | None:
-    db_password = await get_password(db, password_id)
-    if not db_password or db_password.user_id != user_id:
-        return None
-
+    """Update an entry through the write batcher, in its own transaction"""
+    nulls = null_required_fields(password)
+    if nulls:
+        raise ValueError(f"{nulls[0]} cannot be null")
     update_data = password.model_dump(exclude_unset=True)
 
     # Encrypt password if provided
     if "password" in update_data:
-        update_data["encrypted_password"] = encrypt_password(
-            update_data.pop("password")
-        )
+        plaintext = update_data.pop("password")
+        update_data["encrypted_password"] = encrypt_password(plaintext)
+        update_data["password_fingerprint"] = fingerprint_password(user_id, plaintext)
 
     # TOTP URI валидация + извлечение секрета
     if "fa_code" in update_data and update_data["fa_code"]:
         fa_uri = update_data["fa_code"]
         
         # 1. Проверяем валидность URI
-        if not verify_facode(fa_uri):
-            raise ValueError("Invalid TOTP URI format")
+        if not await verify_facode(fa_uri):
+            raise ValueError("Invalid FA code")
         
         # 2. Извлекаем чистый секрет
         # clean_secret = extract_totp_secret(fa_uri)
         update_data["fa_code"] = fa_uri  # Сохраняем только Base32
-        
-        print(f"TOTP validated: {fa_uri[:50]}... → {fa_uri}")
 
-    for field, value in update_data.items():
-        setattr(db_password, field, value)
+    async def write(session: AsyncSession) -> Password | None:
+        db_password = await get_password(session, password_id)
+        if not db_password or db_password.user_id != user_id:
+            return None
 
-    await db.commit()
-    await db.refresh(db_password)
-    return db_password
+        for field, value in update_data.items():
+            setattr(db_password, field, value)
+        db_password.updated_at = datetime.utcnow()
+        db_password.change_seq = await _bump_vault_version(session, user_id)
+        await session.flush()
+        if update_data.keys() & {"title", "email", "username"}:
+            await _index_for_search(session, db_password)
+        return db_password
 
+    return await write_batcher.submit(write)
 
 
 
-async def delete_password(db: AsyncSession, password_id: int, user_id: int) -> bool:
-    db_password = await get_password(db, password_id)
-    if not db_password or db_password.user_id != user_id:
-        return False
 
-    await db.delete(db_password)
-    await db.commit()
-    return True
+async def delete_password(password_id: int, user_id: int) -> bool:
+    """Delete an entry through the write batcher, in its own transaction"""
+    async def write(session: AsyncSession) -> bool:
+        db_password = await get_password(session, password_id)
+        if not db_password or db_password.user_id != user_id:
+            return False
+
+        await session.delete(db_password)
+        await session.flush()
+        await _unindex_for_search(session, password_id)
+        change_seq = await _bump_vault_version(session, user_id)
+        await _add_tombstones(session, user_id, [password_id], change_seq)
+        return True
+
+    return await write_batcher.submit(write)
+
+
+# PasswordUpdate fields whose column may not be NULL
+_REQUIRED_COLUMNS = {
+    field: column
+    for field, column in {
+        "title": "title", "logo": "logo", "email": "email", "username": "username",
+        "password": "encrypted_password", "fa_code": "fa_code",
+    }.items()
+    if not Password.__table__.columns[column].nullable
+}
+
+
+def null_required_fields(data: PasswordUpdate) -> list[str]:
+    """Fields explicitly set to null that the passwords table requires"""
+    return [
+        field
+        for field in _REQUIRED_COLUMNS
+        if field in data.model_fields_set and getattr(data, field) is None
+    ]
+
+
+def _db_error_detail(exc: DBAPIError) -> str:
+    # The driver's message without the SQL statement and parameters
+    return str(exc.orig).split("\n", 1)[0] or "Database error"
+
+
+def _encrypt_all(user_id: int, passwords: list[str]) -> list[tuple[str | bytes, bytes]]:
+    """(ciphertext, fingerprint) of each password"""
+    return [
+        (encrypt_password(password), fingerprint_password(user_id, password))
+        for password in passwords
+    ]
+
+
+async def create_passwords(user_id: int, entries: list[PasswordCreate]) -> list[int]:
+    """Insert many validated entries with one multi-row INSERT; returns their ids"""
+    if not entries:
+        return []
+    # Encryption runs off the event loop while other requests are served
+    encrypted = await asyncio.to_thread(
+        _encrypt_all, user_id, [e.password for e in entries]
+    )
+    rows = [
+        {
+            "user_id": user_id,
+            "title": entry.title,
+            "logo": entry.logo,
+            "email": entry.email,
+            "username": entry.username,
+            "encrypted_password": token,
+            "password_fingerprint": fingerprint,
+            "fa_code": entry.fa_code,
+        }
+        for entry, (token, fingerprint) in zip(entries, encrypted)
+    ]
+
+    async def write(session: AsyncSession) -> list[int]:
+        change_seq = await _bump_vault_version(session, user_id)
+        result = await session.execute(
+            insert(Password).returning(Password.id, sort_by_parameter_order=True),
+            [{**row, "change_seq": change_seq} for row in rows],
+        )
+        ids = list(result.scalars())
+        await _index_many_for_search(
+            session, [{**row, "id": row_id} for row, row_id in zip(rows, ids)]
+        )
+        return ids
+
+    return await write_batcher.submit(write)
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+
+async def import_passwords(
+    user_id: int, entries: AsyncIterator[tuple[int, dict | str]]
+) -> list[dict]:
+    """Validate and insert parsed entries in chunks; one result per entry.
+
+    Chunks of IMPORT_CHUNK_SIZE entries are each written in their own
+    transaction. The next chunk is parsed and validated while the previous
+    one is encrypted and written.
+    """
+    results: list[dict] = []
+    chunk: list[tuple[int, PasswordCreate]] = []
+    pending: asyncio.Task | None = None
+
+    async def write_chunk(items: list[tuple[int, PasswordCreate]]) -> None:
+        ids = await create_passwords(user_id, [entry for _, entry in items])
+        results.extend(
+            {"index": index, "status": "ok", "id": row_id}
+            for (index, _), row_id in zip(items, ids)
+        )
+
+    try:
+        async for index, entry in entries:
+            if index >= settings.IMPORT_MAX_ENTRIES:
+                results.append(
+                    {
+                        "index": index,
+                        "status": "error",
+                        "detail": f"Import stopped at {settings.IMPORT_MAX_ENTRIES} entries",
+                    }
+                )
+                break
+            if isinstance(entry, str):
+                results.append({"index": index, "status": "error", "detail": entry})
+                continue
+            try:
+                password = PasswordCreate.model_validate(entry)
+            except ValidationError as exc:
+                results.append(
+                    {"index": index, "status": "error", "detail": _validation_detail(exc)}
+                )
+                continue
+            if password.fa_code and not await verify_facode(password.fa_code):
+                results.append({"index": index, "status": "error", "detail": "Invalid FA code"})
+                continue
+
+            chunk.append((index, password))
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                if pending is not None:
+                    await pending
+                pending = asyncio.create_task(write_chunk(chunk))
+                chunk = []
+    finally:
+        # Chunks already handed to the writer are committed either way
+        if pending is not None:
+            await pending
+    if chunk:
+        await write_chunk(chunk)
+
+    results.sort(key=lambda result: result["index"])
+    return results
+
+
+async def apply_batch(
+    user_id: int, operations: list[BatchOperation], atomic: bool = True
+) -> tuple[bool, list[dict]]:
+    """Apply mixed create/update/delete operations in one transaction.
+
+    Returns whether anything was written and one result per operation. In
+    atomic mode nothing is written unless every operation is valid.
+    """
+    checked: list[dict] = [{"index": i, "status": "ok"} for i in range(len(operations))]
+
+    # Validation and encryption that need no database access
+    plaintexts: dict[int, str] = {}
+    for index, operation in enumerate(operations):
+        data = getattr(operation, "data", None)
+        nulls = null_required_fields(data) if isinstance(operation, BatchUpdate) else []
+        if nulls:
+            checked[index].update(status="error", detail=f"{nulls[0]} cannot be null")
+        elif data is not None and data.fa_code and not await verify_facode(data.fa_code):
+            checked[index].update(status="error", detail="Invalid FA code")
+        elif data is not None and data.password is not None:
+            plaintexts[index] = data.password
+    # One thread, serially: each encryption takes microseconds and holds the
+    # GIL, so splitting the batch across threads would not speed it up
+    encrypted = dict(
+        zip(
+            plaintexts,
+            await asyncio.to_thread(_encrypt_all, user_id, list(plaintexts.values())),
+        )
+    )
+
+    async def write(session: AsyncSession) -> tuple[bool, list[dict]]:
+        # Fresh copy: the batcher may replay this op
+        results = [dict(result) for result in checked]
+        # Ownership is checked inside the writer, so nothing changes in between
+        target_ids = {op.id for op in operations if not isinstance(op, BatchCreate)}
+        owned = set()
+        if target_ids:
+            owned = set(
+                (
+                    await session.execute(
+                        select(Password.id).where(
+                            Password.id.in_(target_ids), Password.user_id == user_id
+                        )
+                    )
+                ).scalars()
+            )
+
+        deleted: set[int] = set()
+        for index, operation in enumerate(operations):
+            if results[index]["status"] != "ok" or isinstance(operation, BatchCreate):
+                continue
+            if operation.id not in owned or operation.id in deleted:
+                results[index].update(status="error", detail="Password not found")
+            elif isinstance(operation, BatchDelete):
+                deleted.add(operation.id)
+
+        failed = any(result["status"] == "error" for result in results)
+        if atomic and failed:
+            for result in results:
+                if result["status"] == "ok":
+                    result["status"] = "skipped"
+            return False, results
+
+        valid = [
+            (index, operation)
+            for index, operation in enumerate(operations)
+            if results[index]["status"] == "ok"
+        ]
+        creates = [(i, op) for i, op in valid if isinstance(op, BatchCreate)]
+        updates = [(i, op) for i, op in valid if isinstance(op, BatchUpdate)]
+        delete_ops = [(i, op) for i, op in valid if isinstance(op, BatchDelete)]
+        deletes = [op.id for _, op in delete_ops]
+        if not valid:
+            return False, results
+        change_seq = await _bump_vault_version(session, user_id)
+
+        async def write_creates(items: list[tuple[int, BatchCreate]]) -> None:
+            rows = [
+                {
+                    "user_id": user_id,
+                    **op.data.model_dump(exclude={"password"}),
+                    "encrypted_password": encrypted[i][0],
+                    "password_fingerprint": encrypted[i][1],
+                    "change_seq": change_seq,
+                }
+                for i, op in items
+            ]
+            result = await session.execute(
+                insert(Password).returning(Password.id, sort_by_parameter_order=True), rows
+            )
+            ids = list(result.scalars())
+            for (i, _), row_id in zip(items, ids):
+                results[i]["id"] = row_id
+            await _index_many_for_search(
+                session, [{**row, "id": row_id} for row, row_id in zip(rows, ids)]
+            )
+
+        async def write_updates(items: list[tuple[int, BatchUpdate]]) -> None:
+            reindex = set()
+            for i, op in items:
+                values = op.data.model_dump(exclude_unset=True, exclude={"password"})
+                if i in encrypted:
+                    values["encrypted_password"], values["password_fingerprint"] = encrypted[i]
+                await session.execute(
+                    update(Password)
+                    .where(Password.id == op.id)
+                    .values(**values, updated_at=datetime.utcnow(), change_seq=change_seq)
+                    .execution_options(synchronize_session=False)
+                )
+                if values.keys() & {"title", "email", "username"}:
+                    reindex.add(op.id)
+                results[i]["id"] = op.id
+            reindex -= set(deletes)
+            if reindex:
+                rows = (
+                    await session.execute(
+                        select(
+                            Password.id, Password.title, Password.email,
+                            Password.username, Password.user_id,
+                        ).where(Password.id.in_(reindex))
+                    )
+                ).mappings()
+                await _index_many_for_search(session, [dict(row) for row in rows])
+
+        async def write_deletes(items: list[tuple[int, BatchDelete]]) -> None:
+            ids = [op.id for _, op in items]
+            await session.execute(
+                delete(Password)
+                .where(Password.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            await session.execute(
+                text("DELETE FROM passwords_fts WHERE rowid = :id"),
+                [{"id": password_id} for password_id in ids],
+            )
+            await _add_tombstones(session, user_id, ids, change_seq)
+            for i, op in items:
+                results[i]["id"] = op.id
+
+        for write_group, items in (
+            (write_creates, creates), (write_updates, updates), (write_deletes, delete_ops)
+        ):
+            if not items:
+                continue
+            if atomic:
+                await write_group(items)
+                continue
+            # Non-atomic: one failing op must not take the others down with it
+            try:
+                async with session.begin_nested():
+                    await write_group(items)
+            except DBAPIError:
+                for item in items:
+                    try:
+                        async with session.begin_nested():
+                            await write_group([item])
+                    except DBAPIError as exc:
+                        results[item[0]].pop("id", None)
+                        results[item[0]].update(status="error", detail=_db_error_detail(exc))
+
+        return True, results
+
+    return await write_batcher.submit(write)
 
 
 def decrypt_password_for_response(password: Password) -> dict:
@@ -150,4 +784,5 @@ def decrypt_password_for_response(password: Password) -> dict:
         "password": decrypt_password(password.encrypted_password),  # Decrypt here
         "fa_code": password.fa_code,
         "created_at": password.created_at,
+        "updated_at": password.updated_at,
     }
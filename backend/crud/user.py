@@ -5,7 +5,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from ..models import User
 from ..schemas.user import UserCreate, UserUpdate
-from ..core.security import hash_password, verify_password
+from ..core.hashing import hashing_service
 
 
 async def get_user(db: AsyncSession, user_id: int) -> User | None:
@@ -28,7 +28,7 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> User
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await hashing_service.verify_password(password, user.hashed_password):
         return None
     return user
 
@@ -60,7 +60,7 @@ async def get_user_with_passwords_by_secret(
 
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
-    hashed_password = hash_password(user.password)
+    hashed_password = await hashing_service.hash_password(user.password)
     db_user = User(
         secret=uuid.uuid4().hex,
         username=user.username,
@@ -83,7 +83,9 @@ async def update_user(db: AsyncSession, user_id: int, user: UserUpdate) -> User
 
     # Hash password if provided
     if "password" in update_data:
-        update_data["hashed_password"] = hash_password(update_data.pop("password"))
+        update_data["hashed_password"] = await hashing_service.hash_password(
+            update_data.pop("password")
+        )
 
     for field, value in update_data.items():
         setattr(db_user, field, value)
@@ -1,4 +1,4 @@
 from .user import User
-from .password import Password
+from .password import Password, PasswordTombstone
 
-__all__ = ["User", "Password"]
+__all__ = ["User", "Password", "PasswordTombstone"]
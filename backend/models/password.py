@@ -1,11 +1,33 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core import Base
 
 
+class Ciphertext(TypeDecorator):
+    """Legacy Fernet tokens come back as str, binary envelopes as bytes.
+
+    SQLite keeps whichever storage class was written, so the column can hold
+    both during the move to the binary format.
+    """
+
+    impl = Text
+    cache_ok = True
+
+
 class Password(Base):
     __tablename__ = "passwords"
+    __table_args__ = (
+        # Vault listings and ownership checks: WHERE user_id = ? ORDER BY id
+        Index("ix_passwords_user_id_id", "user_id", "id"),
+        # Delta sync: WHERE user_id = ? AND change_seq > ?
+        Index("ix_passwords_user_id_change_seq", "user_id", "change_seq"),
+        # Reuse report: GROUP BY password_fingerprint WHERE user_id = ?
+        Index("ix_passwords_user_id_fingerprint", "user_id", "password_fingerprint"),
+        # Ids are never handed out again: a tombstone must not name a live entry
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -13,9 +35,31 @@ class Password(Base):
     logo = Column(String(500), nullable=True)
     email = Column(String(255), nullable=False)
     username = Column(String(100), nullable=True)
-    encrypted_password = Column(Text, nullable=False)  # Encrypted password (reversible)
+    encrypted_password = Column(Ciphertext, nullable=False)  # Encrypted password (reversible)
+    # Keyed HMAC of the password (see security.fingerprint_password); NULL
+    # until written or backfilled
+    password_fingerprint = Column(LargeBinary(20), nullable=True)
     fa_code = Column(String(100), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+    # Owner's vault_version at the last create/update of this entry
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationship
     user = relationship("User", back_populates="passwords")
+
+
+class PasswordTombstone(Base):
+    """Record of a deleted entry, so delta sync can report the deletion"""
+
+    __tablename__ = "password_tombstones"
+    __table_args__ = (
+        Index("ix_password_tombstones_user_id_change_seq", "user_id", "change_seq"),
+    )
+
+    password_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    user = relationship("User", back_populates="tombstones")
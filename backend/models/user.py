@@ -10,14 +10,19 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     secret = Column(String(255), unique=True, index=True, nullable=False)
     username = Column(String(100), nullable=True)
-    email = Column(String(255), nullable=True)
+    email = Column(String(255), nullable=True, index=True)
     full_name = Column(String(255), nullable=True)
     hashed_password = Column(
         String(255), nullable=False
     )  # User's master password (hashed)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped by every write to the user's passwords; becomes the vault ETag
+    vault_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationship
     passwords = relationship(
         "Password", back_populates="user", cascade="all, delete-orphan"
     )
+    tombstones = relationship(
+        "PasswordTombstone", back_populates="user", cascade="all, delete-orphan"
+    )
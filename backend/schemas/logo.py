@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class LogoResponse(BaseModel):
+    hash: str
+    url: str
+    # Pre-resized variants, fetched with ?size=
+    sizes: list[int]
@@ -1,9 +1,11 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from typing import Annotated, Literal
 
 
 class PasswordBase(BaseModel):
     title: str
+    # Hash returned by POST /logos (preferred), or a URL
     logo: str | None = None
     email: str
     username: str | None = None
@@ -28,5 +30,83 @@ class PasswordResponse(PasswordBase):
     id: int
     user_id: int
     created_at: datetime
+    updated_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ChangesResponse(BaseModel):
+    # Created or updated since the cursor, oldest change first
+    changed: list[PasswordResponse]
+    deleted: list[int]
+    # Pass back as ``since``; more changes are waiting when has_more is set
+    cursor: str
+    has_more: bool
+
+
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    data: PasswordCreate
+
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: PasswordUpdate
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+BatchOperation = Annotated[BatchCreate | BatchUpdate | BatchDelete, Field(discriminator="op")]
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(min_length=1)
+    # All-or-nothing by default; false applies every operation that is valid
+    atomic: bool = True
+
+
+class ItemResult(BaseModel):
+    index: int
+    status: Literal["ok", "error", "skipped"]
+    id: int | None = None
+    detail: str | None = None
+
+
+class BatchResponse(BaseModel):
+    applied: bool
+    results: list[ItemResult]
+
+
+class ImportResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[ItemResult]
+
+
+class BreachedEntry(BaseModel):
+    id: int
+    title: str
+    # Times the password appears in the breach corpus
+    count: int
+
+
+class BreachAuditResponse(BaseModel):
+    checked: int
+    breached: list[BreachedEntry]
+
+
+class ReusedEntry(BaseModel):
+    id: int
+    title: str
+
+
+class ReuseAuditResponse(BaseModel):
+    # Each group shares one password
+    groups: list[list[ReusedEntry]]
+    checked: int
+    # Entries not fingerprinted yet; the backfill job will get to them
+    pending: int
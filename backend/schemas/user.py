@@ -15,6 +15,12 @@ class User(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserToken(User):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
 class UserCreate(UserBase):
     email: str
     password: str  # Plain text password (will be hashed)
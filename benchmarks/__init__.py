@@ -0,0 +1,4 @@
+"""Offline benchmarks for the password manager API.
+
+Run any module with ``python -m benchmarks.<name>`` from the repository root.
+"""
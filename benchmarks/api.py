@@ -0,0 +1,243 @@
+"""End-to-end benchmark of the API's hot paths, fully in-process.
+
+Seeds a throwaway SQLite database with bulk inserts, drives the FastAPI app
+over ASGI (no server, no network) and reports throughput and p50/p95/p99
+latency per scenario. Results are written as JSON; compare two runs with
+``python -m benchmarks.compare old.json new.json``.
+
+    python -m benchmarks.api [--users 50] [--entries 200] [--requests 200]
+                             [--concurrency 10] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from .common import summarize
+
+SCENARIOS = ["login", "register", "get_all", "get", "create", "update", "delete", "totp"]
+TOTP_SECRET = "JBSWY3DPEHPK3PXPJBSWY3DPEHPK3PXP"
+PASSWORD = "benchmark-password"
+
+
+async def seed(users: int, entries: int) -> list[dict]:
+    """Bulk insert users and vault entries; returns id/email/entry ids per user"""
+    from sqlalchemy import insert, text
+    from backend.core import AsyncSessionLocal
+    from backend.core.security import encrypt_password, hash_password
+    from backend.models import Password, User
+
+    hashed = hash_password(PASSWORD)
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(User),
+            [
+                {
+                    "secret": f"bench-secret-{u}",
+                    "email": f"user{u}@bench.local",
+                    "username": f"user{u}",
+                    "hashed_password": hashed,
+                    "created_at": now,
+                }
+                for u in range(users)
+            ],
+        )
+        user_rows = (await db.execute(User.__table__.select().order_by(User.id))).all()
+        await db.execute(
+            insert(Password),
+            [
+                {
+                    "user_id": row.id,
+                    "title": f"Site {e}",
+                    "email": f"user{row.id}@site{e}.example",
+                    "username": f"user{row.id}",
+                    "encrypted_password": encrypt_password(f"pw-{row.id}-{e}"),
+                    "fa_code": TOTP_SECRET if e % 5 == 0 else None,
+                    "created_at": now,
+                }
+                for row in user_rows
+                for e in range(entries)
+            ],
+        )
+        await db.execute(
+            text(
+                "INSERT INTO passwords_fts (rowid, title, email, username, user_id) "
+                "SELECT id, title, email, coalesce(username, ''), user_id FROM passwords"
+            )
+        )
+        await db.commit()
+
+        id_rows = (await db.execute(Password.__table__.select())).all()
+    entry_ids: dict[int, list[int]] = {}
+    for row in id_rows:
+        entry_ids.setdefault(row.user_id, []).append(row.id)
+    return [
+        {"id": row.id, "email": row.email, "entries": entry_ids.get(row.id, [])}
+        for row in user_rows
+    ]
+
+
+async def seed_deletable(users: list[dict], count: int) -> None:
+    """Extra entries for the delete scenario, so it can also run on its own"""
+    from sqlalchemy import insert
+    from backend.core import AsyncSessionLocal
+    from backend.core.security import encrypt_password
+    from backend.models import Password
+
+    async with AsyncSessionLocal() as db:
+        for n in range(count):
+            user = users[n % len(users)]
+            result = await db.execute(
+                insert(Password).returning(Password.id),
+                {
+                    "user_id": user["id"],
+                    "title": f"Disposable {n}",
+                    "email": "gone@site.example",
+                    "encrypted_password": encrypt_password("gone"),
+                    "created_at": datetime.utcnow(),
+                },
+            )
+            user.setdefault("created", []).append(result.scalar_one())
+        await db.commit()
+
+
+async def run_scenario(name: str, app, users: list[dict], requests: int, concurrency: int) -> dict:
+    from backend.core.tokens import create_access_token
+    from .asgi import request
+
+    tokens = {u["id"]: {"authorization": f"Bearer {create_access_token(u['id'])}"} for u in users}
+    counter = itertools.count()
+    rng = random.Random(name)
+    failures = 0
+
+    async def one() -> None:
+        nonlocal failures
+        n = next(counter)
+        user = users[n % len(users)]
+        headers = tokens[user["id"]]
+
+        if name == "login":
+            response = await request(
+                app, "POST", "/api/v1/auth", json={"email": user["email"], "password": PASSWORD}
+            )
+        elif name == "register":
+            response = await request(
+                app, "POST", "/api/v1/auth/register",
+                json={"email": f"new{n}-{time.time_ns()}@bench.local", "password": PASSWORD},
+            )
+        elif name == "get_all":
+            response = await request(app, "POST", "/api/v1/passwords/get-all", headers=headers)
+        elif name == "get":
+            entry_id = rng.choice(user["entries"])
+            response = await request(app, "GET", f"/api/v1/passwords/{entry_id}", headers=headers)
+        elif name == "create":
+            response = await request(
+                app, "POST", "/api/v1/passwords", headers=headers,
+                json={"title": f"New {n}", "email": "new@site.example", "password": f"pw{n}"},
+            )
+            if response.status_code == 201:
+                user.setdefault("created", []).append(response.json()["id"])
+        elif name == "update":
+            entry_id = rng.choice(user["entries"])
+            response = await request(
+                app, "PATCH", f"/api/v1/passwords/{entry_id}", headers=headers,
+                json={"title": f"Renamed {n}"},
+            )
+        elif name == "delete":
+            response = await request(
+                app, "DELETE", f"/api/v1/passwords/{user['created'].pop()}", headers=headers
+            )
+        elif name == "totp":
+            response = await request(app, "GET", "/api/v1/passwords/totp", headers=headers)
+        else:
+            raise ValueError(f"Unknown scenario {name}")
+
+        if response.status_code >= 400:
+            failures += 1
+
+    latencies: list[float] = []
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            started = time.perf_counter()
+            await one()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    per_worker = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(c) for c in per_worker if c))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["errors"] = failures
+    return result
+
+
+async def run(args) -> dict:
+    from backend import app
+
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        users = await seed(args.users, args.entries)
+        seed_s = time.perf_counter() - started
+
+        scenarios = {}
+        for name in args.scenarios:
+            requests = args.requests
+            if name in ("login", "register"):
+                # Argon2 scenarios are orders of magnitude slower; keep them short
+                requests = min(requests, args.auth_requests)
+            if name == "delete":
+                await seed_deletable(users, requests)
+            scenarios[name] = await run_scenario(name, app, users, requests, args.concurrency)
+            print(f"{name:>9}: {scenarios[name]}", file=sys.stderr)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "users": args.users,
+            "entries_per_user": args.entries,
+            "requests": args.requests,
+            "auth_requests": args.auth_requests,
+            "concurrency": args.concurrency,
+        },
+        "seed_seconds": round(seed_s, 3),
+        "scenarios": scenarios,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=200, help="Entries per user")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--auth-requests", type=int, default=20, help="Cap for login/register")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--output", help="Write the JSON result here as well")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/api.db"
+        os.environ.setdefault("DATABASE_MAINTENANCE_INTERVAL_SECONDS", "0")
+        result = asyncio.run(run(args))
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
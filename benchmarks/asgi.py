@@ -0,0 +1,71 @@
+"""Tiny in-process ASGI client so benchmarks need no HTTP server or extra deps"""
+
+import json as jsonlib
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+
+@dataclass
+class Response:
+    status_code: int
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self):
+        return jsonlib.loads(self.body)
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    json=None,
+    params: dict | None = None,
+    headers: dict[str, str] | None = None,
+    client: str = "127.0.0.1",
+) -> Response:
+    body = b"" if json is None else jsonlib.dumps(json).encode()
+    raw_headers = [(b"host", b"bench")]
+    if json is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    for key, value in (headers or {}).items():
+        raw_headers.append((key.lower().encode(), value.encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "headers": raw_headers,
+        "client": (client, 1234),
+        "server": ("bench", 80),
+    }
+
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status_code = 0
+    response_headers: dict[str, str] = {}
+    chunks: list[bytes] = []
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            for key, value in message.get("headers", []):
+                response_headers[key.decode().lower()] = value.decode()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return Response(status_code, response_headers, b"".join(chunks))
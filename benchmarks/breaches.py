@@ -0,0 +1,137 @@
+"""Lookup rate and resident memory of the memory-mapped breach corpus.
+
+Builds a synthetic sorted ``SHA1:COUNT`` corpus (or uses ``--corpus``),
+then measures single-thread lookups per second for a mix of hits and
+misses, the process's resident memory before and after, and one
+``/passwords/audit/breached`` call over a seeded vault.
+
+    python -m benchmarks.breaches [--hashes 2000000] [--lookups 200000] [--entries 1000]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+
+
+def resident_kb() -> dict:
+    """Resident memory split into anonymous and file-backed pages (Linux)"""
+    usage = {}
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile"):
+                    usage[key] = int(value.split()[0])
+    except OSError:
+        import resource
+
+        usage["maxrss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+
+def known_password(index: int) -> str:
+    # Matches the passwords benchmarks.api.seed gives user 1
+    return f"pw-1-{index}"
+
+
+def build_corpus(path: str, hashes: int, known: int) -> None:
+    """Random SHA-1 lines plus the hashes of ``known`` seeded passwords"""
+    rng = random.Random(0)
+    lines = [f"{rng.getrandbits(160):040X}:{rng.randint(1, 5000)}" for _ in range(hashes - known)]
+    lines += [
+        f"{hashlib.sha1(known_password(i).encode()).hexdigest().upper()}:{i + 1}"
+        for i in range(known)
+    ]
+    lines.sort()
+    with open(path, "w", newline="") as corpus:
+        corpus.write("\r\n".join(lines))
+        corpus.write("\r\n")
+
+
+def measure_lookups(path: str, lookups: int, known: int) -> dict:
+    from backend.core.breaches import BreachCorpus, password_hash
+
+    before = resident_kb()
+    corpus = BreachCorpus(path, "sha1")
+    rng = random.Random(1)
+    # One in ten is a hit when the corpus has seeded passwords
+    digests = [
+        password_hash(known_password(rng.randrange(known)), "sha1")
+        if known and i % 10 == 0
+        else f"{rng.getrandbits(160):040X}".encode()
+        for i in range(lookups)
+    ]
+    started = time.perf_counter()
+    hits = sum(1 for digest in digests if corpus.count(digest))
+    elapsed = time.perf_counter() - started
+    after = resident_kb()
+    corpus.close()
+    return {
+        "corpus_mb": round(os.path.getsize(path) / 2**20, 1),
+        "lookups": lookups,
+        "hits": hits,
+        "lookups_per_s": round(lookups / elapsed),
+        "us_per_lookup": round(elapsed / lookups * 1e6, 2),
+        "rss_kb_before": before,
+        "rss_kb_after": after,
+    }
+
+
+async def measure_audit(path: str, entries: int) -> dict:
+    from backend import app
+    from backend.core.breaches import breach_checker
+    from backend.core.tokens import create_access_token
+
+    from .api import seed
+    from .asgi import request
+
+    breach_checker.path = path
+    async with app.router.lifespan_context(app):
+        (user,) = await seed(1, entries)
+        headers = {"authorization": f"Bearer {create_access_token(user['id'])}"}
+        started = time.perf_counter()
+        response = await request(app, "POST", "/api/v1/passwords/audit/breached", headers=headers)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.body
+        body = response.json()
+    return {
+        "entries": body["checked"],
+        "breached": len(body["breached"]),
+        "ms": round(elapsed * 1000, 1),
+        "entries_per_s": round(body["checked"] / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hashes", type=int, default=2_000_000, help="Synthetic corpus size")
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--entries", type=int, default=1000, help="Vault size for the audit call")
+    parser.add_argument("--corpus", help="Use an existing SHA-1 corpus instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.corpus
+        known = 0 if path else min(args.entries, args.hashes) // 10
+        if not path:
+            path = os.path.join(tmp, "corpus.txt")
+            started = time.perf_counter()
+            build_corpus(path, args.hashes, known)
+            print(f"built corpus in {time.perf_counter() - started:.1f}s", flush=True)
+
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/breaches.db"
+        os.environ.setdefault("DATABASE_MAINTENANCE_INTERVAL_SECONDS", "0")
+        result = {
+            "lookup": measure_lookups(path, args.lookups, known),
+            "audit": asyncio.run(measure_audit(path, args.entries)),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Per-entry encrypt/decrypt cost and stored size of each ciphertext format.
+
+    python -m benchmarks.ciphers [--entries 20000] [--length 20]
+"""
+
+import argparse
+import json
+import secrets
+import time
+
+
+def measure(cipher: str, passwords: list[str]) -> dict:
+    from backend.core import security
+    from backend.core.config import settings
+
+    settings.CIPHER = cipher
+    started = time.perf_counter()
+    stored = [security.encrypt_password(p) for p in passwords]
+    encrypt_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for token in stored:
+        security.decrypt_password(token)
+    decrypt_s = time.perf_counter() - started
+
+    count = len(passwords)
+    return {
+        "encrypt_us": round(encrypt_s / count * 1e6, 2),
+        "decrypt_us": round(decrypt_s / count * 1e6, 2),
+        "stored_bytes": round(sum(len(t) for t in stored) / count, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--length", type=int, default=20, help="Plaintext length")
+    args = parser.parse_args()
+
+    from backend.core import security
+
+    security.get_fernet()  # derive keys outside the timed loops
+    passwords = [secrets.token_urlsafe(args.length)[: args.length] for _ in range(args.entries)]
+    results = {cipher: measure(cipher, passwords) for cipher in ("fernet", "aesgcm", "chacha20")}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
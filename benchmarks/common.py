@@ -0,0 +1,44 @@
+"""Helpers shared by the benchmark scripts"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_child(module: str, args: list[str], env: dict[str, str] | None = None) -> dict:
+    """Run ``python -m module --child ...`` against a throwaway database.
+
+    Settings are read at import time, so each configuration under test gets a
+    fresh interpreter. The child prints its result as JSON on the last line.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        child_env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db",
+            **(env or {}),
+        }
+        output = subprocess.check_output(
+            [sys.executable, "-m", module, "--child", *args], env=child_env
+        )
+    return json.loads(output.splitlines()[-1])
+
+
+def summarize(latencies_ms: list[float], elapsed_s: float) -> dict:
+    """Throughput and latency percentiles for one scenario"""
+    return {
+        "requests": len(latencies_ms),
+        "throughput_rps": round(len(latencies_ms) / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+    }
@@ -0,0 +1,48 @@
+"""Diff two ``benchmarks.api`` result files scenario by scenario.
+
+Exits non-zero if any scenario's p95 got slower than ``--threshold`` percent.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 20]
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def change(old: float, new: float) -> float:
+    return 0.0 if not old else (new - old) / old * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed p95 slowdown in %%")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["scenarios"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["scenarios"]
+
+    regressions = []
+    print(f"{'scenario':<10}" + "".join(f"{m:>24}" for m in METRICS))
+    for name in (n for n in baseline if n in candidate):
+        old, new = baseline[name], candidate[name]
+        cells = "".join(
+            f"{old[m]:>9.1f} -> {new[m]:>7.1f} {change(old[m], new[m]):+4.0f}%" for m in METRICS
+        )
+        print(f"{name:<10}{cells}")
+        if change(old["p95_ms"], new["p95_ms"]) > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"p95 regressed by more than {args.threshold:.0f}%: {', '.join(sorted(regressions))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
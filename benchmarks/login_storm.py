@@ -0,0 +1,117 @@
+"""Read latency while a burst of logins hammers Argon2.
+
+Runs the same workload twice in fresh processes: once with hashing inline on
+the event loop (``HASH_POOL_SIZE=0``, the old behaviour) and once with the
+process pool, then prints p50/p99 latency of concurrent ``/passwords/get-all``
+reads for both. Logins come from ``--clients`` addresses; the ones turned
+away by admission control (503) are counted separately.
+
+    python -m benchmarks.login_storm [--logins 40] [--clients 10] [--readers 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from .common import percentile, run_child
+
+
+async def run_storm(logins: int, clients: int, readers: int) -> dict:
+    from backend import app
+    from backend.core import AsyncSessionLocal
+    from backend.models import Password
+    from .asgi import request
+
+    async with app.router.lifespan_context(app):
+        credentials = {"email": "storm@example.com", "password": "correct horse"}
+        await request(
+            app, "POST", "/api/v1/auth/register", json={**credentials, "username": "storm"}
+        )
+        user = (await request(app, "POST", "/api/v1/auth", json=credentials)).json()
+
+        async with AsyncSessionLocal() as db:
+            from backend.core.security import encrypt_password
+
+            db.add_all(
+                Password(
+                    user_id=user["id"],
+                    title=f"entry {i}",
+                    email=f"entry{i}@example.com",
+                    encrypted_password=encrypt_password(f"secret-{i}"),
+                )
+                for i in range(50)
+            )
+            await db.commit()
+
+        latencies: list[float] = []
+        storm_done = asyncio.Event()
+
+        async def reader():
+            while not storm_done.is_set():
+                started = time.perf_counter()
+                await request(
+                    app, "POST", "/api/v1/passwords/get-all", json={"secret": user["secret"]}
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0)
+
+        statuses: list[int] = []
+
+        async def login(n: int):
+            response = await request(
+                app, "POST", "/api/v1/auth", json=credentials, client=f"10.0.0.{n % clients}"
+            )
+            statuses.append(response.status_code)
+
+        reader_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+        started = time.perf_counter()
+        await asyncio.gather(*(login(n) for n in range(logins)))
+        storm_seconds = time.perf_counter() - started
+        storm_done.set()
+        await asyncio.gather(*reader_tasks)
+
+    return {
+        "reads": len(latencies),
+        "storm_seconds": round(storm_seconds, 3),
+        "logins_ok": statuses.count(200),
+        "logins_rejected": statuses.count(503),
+        "read_p50_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "read_p99_ms": round(percentile(latencies, 99), 2),
+        "read_max_ms": round(max(latencies, default=0.0), 2),
+    }
+
+
+def run_mode(mode: str, args) -> dict:
+    return run_child(
+        "benchmarks.login_storm",
+        [
+            "--logins", str(args.logins),
+            "--clients", str(args.clients),
+            "--readers", str(args.readers),
+        ],
+        env={"HASH_POOL_SIZE": "0" if mode == "inline" else str(args.pool_size)},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=10, help="Distinct client addresses")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_storm(args.logins, args.clients, args.readers))))
+        return
+
+    results = {mode: run_mode(mode, args) for mode in ("inline", "pool")}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Bytes on the wire and CPU per vault listing for each format and encoding.
+
+The ``encode`` section compares the old path (response model validation plus
+the stdlib encoder) with the direct encoders on the same rows; the ``api``
+section drives ``/passwords/get-all`` end to end for every Accept /
+Accept-Encoding combination the server supports.
+
+    python -m benchmarks.serialization [--entries 500] [--requests 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+
+def sample_rows(count: int) -> list[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": i,
+            "user_id": 1,
+            "title": f"Site {i}",
+            "logo": None,
+            "email": f"user@site{i}.example",
+            "username": "user",
+            "password": f"correct-horse-battery-{i}",
+            "fa_code": "JBSWY3DPEHPK3PXPJBSWY3DP" if i % 5 == 0 else None,
+            "created_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def cpu_us(func, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return round((time.process_time() - started) / repeat * 1e6, 1)
+
+
+def measure_encoders(rows: list[dict], repeat: int) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from backend.core import serialization
+    from backend.schemas.password import PasswordResponse
+
+    adapter = TypeAdapter(list[PasswordResponse])
+
+    def validated_stdlib() -> bytes:
+        content = jsonable_encoder(adapter.validate_python(rows))
+        return json.dumps(content).encode()
+
+    encoders = {"validated+stdlib": validated_stdlib, "json": lambda: serialization.dumps_json(rows)}
+    if serialization.msgpack is not None:
+        encoders["msgpack"] = lambda: serialization.dumps_msgpack(rows)
+    return {
+        name: {"bytes": len(encode()), "cpu_us": cpu_us(encode, repeat)}
+        for name, encode in encoders.items()
+    }
+
+
+async def measure_api(entries: int, requests: int) -> dict:
+    from backend import app
+    from backend.core import compression, serialization
+    from backend.core.tokens import create_access_token
+
+    from .api import seed
+    from .asgi import request
+
+    accepts = [serialization.JSON_MEDIA_TYPE, serialization.NDJSON_MEDIA_TYPE]
+    if serialization.msgpack is not None:
+        accepts.append(serialization.MSGPACK_MEDIA_TYPE)
+    encodings = ["identity", "gzip"] + (["zstd"] if compression.zstandard is not None else [])
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        (user,) = await seed(1, entries)
+        headers = {"authorization": f"Bearer {create_access_token(user['id'])}"}
+        for accept in accepts:
+            for encoding in encodings:
+                combo = {**headers, "accept": accept, "accept-encoding": encoding}
+                response = await request(app, "POST", "/api/v1/passwords/get-all", headers=combo)
+                assert response.status_code == 200, response.status_code
+                started = time.process_time()
+                for _ in range(requests):
+                    await request(app, "POST", "/api/v1/passwords/get-all", headers=combo)
+                elapsed = time.process_time() - started
+                results[f"{accept.rsplit('/', 1)[1]}+{encoding}"] = {
+                    "bytes": len(response.body),
+                    "cpu_ms": round(elapsed / requests * 1000, 3),
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=500, help="Entries in the vault")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per combination")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/serialization.db"
+        os.environ.setdefault("DATABASE_MAINTENANCE_INTERVAL_SECONDS", "0")
+        result = {
+            "entries": args.entries,
+            "encode": measure_encoders(sample_rows(args.entries), args.requests),
+            "api": asyncio.run(measure_api(args.entries, args.requests)),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Cold start cost: import time of ``backend`` and time to the first /health.
+
+Import time comes from ``python -X importtime``; time to first response is
+measured by starting uvicorn on a free port and polling ``/health``. Pass
+``--history`` to append each run, tagged with the git commit, to a JSONL
+file so startup regressions show up over time.
+
+    python -m benchmarks.startup [--runs 3] [--history .benchmarks/startup.jsonl]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+
+def import_time_ms(env: dict) -> tuple[float, list[tuple[str, float]]]:
+    """Cumulative import time of ``backend`` and its slowest direct imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        micros = int(cumulative)
+        if name.strip() == "backend":
+            total = micros / 1000
+        # Two levels of indentation = modules imported directly by backend.*
+        elif name.startswith("   ") and not name.startswith("     "):
+            modules.append((name.strip(), micros / 1000))
+    modules.sort(key=lambda m: m[1], reverse=True)
+    return total, modules[:10]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_health_ms(env: dict, timeout: float = 30.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.5) as sock:
+                    sock.sendall(b"GET /health HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+                    if sock.recv(64).startswith(b"HTTP/1.1 200"):
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError("Server did not answer /health in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--history", help="Append the result to this JSONL file")
+    args = parser.parse_args()
+
+    imports, health = [], []
+    modules = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/startup.db"}
+        for _ in range(args.runs):
+            total, modules = import_time_ms(env)
+            imports.append(total)
+            health.append(first_health_ms(env))
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "import_ms": round(statistics.median(imports), 1),
+        "first_health_ms": round(statistics.median(health), 1),
+        "slowest_imports_ms": {name: round(ms, 1) for name, ms in modules},
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.history:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""How many idle TOTP stream subscribers one worker can hold.
+
+Opens N subscriptions through the broadcaster, each with a consumer task the
+way an open SSE response has one, then reports memory per subscriber and
+how long a single tick takes to fan out. A share of the consumers never
+read, to show that slow clients only cost one dropped payload each.
+
+    python -m benchmarks.totp_subscribers [--subscribers 1000 10000] [--users 500]
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+import tracemalloc
+
+from .common import run_child
+
+SECRET = "JBSWY3DPEHPK3PXPJBSWY3DPEHPK3PXP"
+
+
+async def hold(subscribers: int, users: int, entries: int, slow_share: float) -> dict:
+    from backend import app
+    from backend.core import AsyncSessionLocal
+    from backend.core.totp_stream import totp_broadcaster
+    from backend.models import Password, User
+
+    async with app.router.lifespan_context(app):
+        async with AsyncSessionLocal() as db:
+            db.add_all(
+                User(secret=f"s{u}", email=f"u{u}@example.com", hashed_password="x")
+                for u in range(users)
+            )
+            await db.flush()
+            db.add_all(
+                Password(
+                    user_id=u + 1, title=f"t{e}", email="e", encrypted_password="x", fa_code=SECRET
+                )
+                for u in range(users)
+                for e in range(entries)
+            )
+            await db.commit()
+
+        received = 0
+
+        async def consume(subscription):
+            nonlocal received
+            while True:
+                await subscription.get()
+                received += 1
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        subscriptions = [totp_broadcaster.subscribe(n % users + 1) for n in range(subscribers)]
+        fast = int(subscribers * (1 - slow_share))
+        consumers = [asyncio.create_task(consume(s)) for s in subscriptions[:fast]]
+        await asyncio.sleep(0)
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        tick_ms = []
+        for _ in range(3):
+            started = time.perf_counter()
+            await totp_broadcaster.tick()
+            tick_ms.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0)
+
+        for task in consumers:
+            task.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+        dropped = sum(s.dropped for s in subscriptions)
+        for subscription in subscriptions:
+            totp_broadcaster.unsubscribe(subscription)
+
+    return {
+        "subscribers": subscribers,
+        "bytes_per_subscriber": round((after - before) / subscribers),
+        "tick_ms": round(min(tick_ms), 2),
+        "delivered": received,
+        "dropped_for_slow_clients": dropped,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--entries", type=int, default=5, help="2FA entries per user")
+    parser.add_argument("--slow-share", type=float, default=0.1)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(
+            hold(args.subscribers[0], args.users, args.entries, args.slow_share)
+        )
+        print(json.dumps(result))
+        return
+
+    results = [
+        run_child(
+            "benchmarks.totp_subscribers",
+            [
+                "--subscribers", str(n), "--users", str(args.users),
+                "--entries", str(args.entries), "--slow-share", str(args.slow_share),
+            ],
+            env={"TOTP_STREAM_MAX_SUBSCRIBERS": str(n)},
+        )
+        for n in args.subscribers
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
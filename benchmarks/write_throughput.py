@@ -0,0 +1,77 @@
+"""Vault writes per second at 1, 10 and 100 concurrent clients.
+
+Compares committing every mutation on its own (``WRITE_BATCH_MAX_SIZE=0``)
+with the group-commit writer. Each client runs create -> update -> delete
+cycles through ``backend.crud.password`` for a fixed number of operations.
+
+    python -m benchmarks.write_throughput [--ops 300] [--clients 1 10 100]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from .common import run_child
+
+
+async def run_clients(clients: int, ops: int) -> dict:
+    from backend import app
+    from backend.core import AsyncSessionLocal
+    from backend.crud import password as password_crud
+    from backend.models import User
+    from backend.schemas.password import PasswordCreate, PasswordUpdate
+
+    async with app.router.lifespan_context(app):
+        async with AsyncSessionLocal() as db:
+            user = User(secret="writer", email="writer@example.com", hashed_password="x")
+            db.add(user)
+            await db.commit()
+
+        per_client = max(1, ops // clients)
+
+        async def client(n: int):
+            for i in range(0, per_client, 3):
+                created = await password_crud.create_password(
+                    PasswordCreate(title=f"c{n}-{i}", email="e", password="p"),
+                    user_id=user.id,
+                )
+                await password_crud.update_password(
+                    created.id, PasswordUpdate(title="renamed"), user_id=user.id
+                )
+                await password_crud.delete_password(created.id, user_id=user.id)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    writes = clients * len(range(0, per_client, 3)) * 3
+    return {"writes": writes, "seconds": round(elapsed, 3), "writes_per_s": round(writes / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=300, help="Writes per run")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_clients(args.clients[0], args.ops))))
+        return
+
+    results = {}
+    for mode, batch_size in (("per_write_commit", "0"), ("group_commit", "64")):
+        results[mode] = {
+            clients: run_child(
+                "benchmarks.write_throughput",
+                ["--clients", str(clients), "--ops", str(args.ops)],
+                env={"WRITE_BATCH_MAX_SIZE": batch_size},
+            )
+            for clients in args.clients
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
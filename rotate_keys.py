@@ -0,0 +1,21 @@
+import asyncio
+import logging
+
+from backend.core import init_db, close_db
+from backend.core.migrations import run_migrations
+from backend.core.key_rotation import key_rotation_job
+
+
+async def main():
+    await init_db()
+    await run_migrations()
+    try:
+        progress = await key_rotation_job.run()
+    finally:
+        await close_db()
+    print(f"{progress.rotated} rows re-encrypted, last id {progress.last_id}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,192 @@
+"""Production entry point: preforked uvicorn workers sharing one socket.
+
+The supervisor process sets up the database and runs migrations once, derives
+the encryption keys and imports the app, then forks the workers, which inherit
+all of it. Workers use uvloop/httptools when installed (the ``server``
+extra, ``uvicorn[standard]``). SIGTERM/SIGINT stop accepting connections and let
+in-flight requests finish; workers that die unexpectedly are replaced.
+
+With more than one worker, logouts are shared through the database and
+every worker picks them up within TOKEN_DENYLIST_REFRESH_SECONDS. Other per-process state is not
+shared: AUTH_MAX_CONCURRENCY and the AUTH_QUEUE_* limits apply to each
+worker (N workers admit N times as many logins), and each worker has its
+own write batcher, so writes from different workers are serialized by
+SQLite's lock and ``busy_timeout`` rather than by a single writer.
+
+    python serve.py [--host 0.0.0.0] [--port 8000] [--workers N]
+
+``run.py`` remains the auto-reloading development server.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+
+async def prepare_database() -> None:
+    from backend.core import close_db, init_db
+    from backend.core.migrations import run_migrations
+
+    await init_db()
+    applied = await run_migrations()
+    if applied:
+        logger.info("Applied migrations %s", applied)
+    # Workers must not inherit open connections
+    await close_db()
+
+
+def warn_per_worker_limits(workers: int) -> None:
+    from backend.core.config import settings
+
+    if workers > 1:
+        logger.warning(
+            "Running %d workers: AUTH_MAX_CONCURRENCY=%d and AUTH_QUEUE_SIZE=%d apply "
+            "per worker (%d and %d in total); each worker batches its own writes",
+            workers, settings.AUTH_MAX_CONCURRENCY, settings.AUTH_QUEUE_SIZE,
+            workers * settings.AUTH_MAX_CONCURRENCY, workers * settings.AUTH_QUEUE_SIZE,
+        )
+
+
+def preload(workers: int):
+    """Everything that should happen once rather than once per worker"""
+    asyncio.run(prepare_database())
+
+    from backend import app
+    from backend.core import security
+    from backend.core.config import settings
+
+    security.warm_up()
+    settings.DATABASE_SETUP_ON_STARTUP = False
+    # A logout must hold on every worker, not just the one that served it
+    settings.TOKEN_DENYLIST_SHARED = workers > 1
+    return app
+
+
+def run_worker(config: uvicorn.Config, sock, index: int) -> None:
+    from backend.core.config import settings
+
+    # Resumable background jobs and database maintenance run in a single worker
+    if index != 0:
+        from backend.core.maintenance import maintenance_task
+
+        settings.KEY_ROTATION_ON_STARTUP = False
+        settings.FINGERPRINT_BACKFILL_ON_STARTUP = False
+        maintenance_task.interval = 0
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config, sock, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.children: dict[int, int] = {}  # pid -> worker index
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)
+            try:
+                run_worker(self.config, self.sock, index)
+            finally:
+                os._exit(0)
+        self.children[pid] = index
+
+    def stop(self, signum, frame) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Shutting down %d workers", len(self.children))
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+        logger.info(
+            "Serving on http://%s:%d with %d workers",
+            self.config.host, self.config.port, self.workers,
+        )
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self.children.pop(pid, None)
+            if index is None or self.stopping:
+                continue
+            logger.warning(
+                "Worker %d (pid %d) exited with %s; restarting",
+                index, pid, os.waitstatus_to_exitcode(status),
+            )
+            time.sleep(0.5)
+            self.spawn(index)
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=30,
+        help="Seconds to let in-flight requests finish on shutdown",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s:     %(message)s")
+
+    if not hasattr(os, "fork"):
+        # No preforking on this platform: uvicorn spawns fresh interpreters
+        asyncio.run(prepare_database())
+        os.environ["DATABASE_SETUP_ON_STARTUP"] = "false"
+        if args.workers > 1:
+            os.environ["TOKEN_DENYLIST_SHARED"] = "true"
+        warn_per_worker_limits(args.workers)
+        uvicorn.run(
+            "backend:app", host=args.host, port=args.port, workers=args.workers,
+            timeout_graceful_shutdown=args.graceful_timeout, log_level=args.log_level,
+        )
+        return
+
+    workers = max(1, args.workers)
+    app = preload(workers)
+    warn_per_worker_limits(workers)
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        proxy_headers=True,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+    sock = config.bind_socket()
+    Supervisor(config, sock, workers).run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
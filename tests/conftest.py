@@ -0,0 +1,46 @@
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read at import time: point them at a throwaway database first
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp}/test.db")
+os.environ.setdefault("HASH_POOL_SIZE", "0")
+os.environ.setdefault("DATABASE_MAINTENANCE_INTERVAL_SECONDS", "0")
+os.environ.setdefault("LOGO_DIR", f"{_tmp}/logos")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_users = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from backend import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def _register(client) -> dict:
+    credentials = {"email": f"user{next(_users)}@test.local", "password": "pw"}
+    response = client.post("/api/v1/auth/register", json={**credentials, "username": "u"})
+    assert response.status_code == 201, response.text
+    token = client.post("/api/v1/auth", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Bearer headers of a freshly registered user"""
+    return _register(client)
+
+
+@pytest.fixture
+def other_auth_headers(client):
+    """Bearer headers of a second, unrelated user"""
+    return _register(client)
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from backend.core.admission import AdmissionController, AdmissionRejected
+
+
+def _controller(per_client: int) -> AdmissionController:
+    return AdmissionController(
+        "test", max_concurrent=1, queue_size=4, per_client=per_client, timeout=5
+    )
+
+
+def test_per_client_zero_only_applies_the_shared_queue():
+    async def scenario():
+        admission = _controller(per_client=0)
+        await admission.acquire("a")
+        waiters = [asyncio.create_task(admission.acquire("a")) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert admission.queued == 3
+
+        for waiter in waiters:
+            admission.release(0.01)
+            await waiter
+        admission.release(0.01)
+        assert (admission.active, admission.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_client_over_its_share_is_rejected_and_the_queue_still_drains():
+    async def scenario():
+        admission = _controller(per_client=1)
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected, match="client_limit"):
+            await admission.acquire("b")
+        admission.release(0.01)
+        await waiter
+        admission.release(0.01)
+        assert (admission.active, admission.queued) == (0, 0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+from backend.crud import password as password_crud
+
+
+def _create(client, headers, title="t"):
+    response = client.post(
+        "/api/v1/passwords",
+        json={"title": title, "email": "e", "password": "p"},
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _batch(client, headers, operations, atomic):
+    return client.post(
+        "/api/v1/passwords/batch",
+        json={"operations": operations, "atomic": atomic},
+        headers=headers,
+    )
+
+
+def test_null_for_a_required_field_fails_only_that_op(client, auth_headers):
+    password_id = _create(client, auth_headers)
+    operations = [
+        {"op": "update", "id": password_id, "data": {"title": None}},
+        {"op": "update", "id": password_id, "data": {"email": None}},
+        {"op": "create", "data": {"title": "kept", "email": "e", "password": "p"}},
+    ]
+
+    response = _batch(client, auth_headers, operations, atomic=False)
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["error", "error", "ok"]
+    assert results[0]["detail"] == "title cannot be null"
+
+    response = _batch(client, auth_headers, operations, atomic=True)
+    assert response.status_code == 409, response.text
+    assert [r["status"] for r in response.json()["results"]] == ["error", "error", "skipped"]
+
+
+def test_non_atomic_batch_isolates_a_failing_write(client, auth_headers, monkeypatch):
+    # Let the null through validation so the database rejects it
+    monkeypatch.setattr(password_crud, "null_required_fields", lambda data: [])
+    first, second = _create(client, auth_headers, "first"), _create(client, auth_headers, "second")
+    operations = [
+        {"op": "update", "id": first, "data": {"title": "renamed"}},
+        {"op": "update", "id": second, "data": {"title": None}},
+    ]
+
+    response = _batch(client, auth_headers, operations, atomic=False)
+    assert response.status_code == 200, response.text
+    assert [r["status"] for r in response.json()["results"]] == ["ok", "error"]
+    titles = [
+        client.get(f"/api/v1/passwords/{password_id}", headers=auth_headers).json()["title"]
+        for password_id in (first, second)
+    ]
+    assert titles == ["renamed", "second"]
+
+
+def test_patch_rejects_null_for_a_required_field(client, auth_headers):
+    password_id = _create(client, auth_headers)
+    response = client.patch(
+        f"/api/v1/passwords/{password_id}", json={"title": None}, headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "title cannot be null"
@@ -0,0 +1,100 @@
+import hashlib
+
+import pytest
+
+from backend.core.breaches import BreachChecker, BreachCorpus, _md4, password_hash
+
+
+def _sha1(password: str) -> bytes:
+    return hashlib.sha1(password.encode()).hexdigest().upper().encode()
+
+
+PASSWORDS = {f"password{i}": i + 1 for i in range(50)}
+
+
+def _write_corpus(path, newline="\r\n", trailing=True):
+    lines = sorted(f"{_sha1(p).decode()}:{count}" for p, count in PASSWORDS.items())
+    path.write_text(newline.join(lines) + (newline if trailing else ""), newline="")
+    return lines
+
+
+@pytest.mark.parametrize("newline", ["\r\n", "\n"])
+@pytest.mark.parametrize("trailing", [True, False])
+def test_every_record_is_found(tmp_path, newline, trailing):
+    path = tmp_path / "corpus.txt"
+    _write_corpus(path, newline, trailing)
+    corpus = BreachCorpus(path)
+    try:
+        for password, count in PASSWORDS.items():
+            assert corpus.count_password(password) == count
+    finally:
+        corpus.close()
+
+
+def test_first_and_last_records_and_misses_around_them(tmp_path):
+    path = tmp_path / "corpus.txt"
+    lines = _write_corpus(path)
+    first, last = lines[0].split(":")[0].encode(), lines[-1].split(":")[0].encode()
+    corpus = BreachCorpus(path)
+    try:
+        assert corpus.count(first) and corpus.count(last)
+        assert corpus.count(b"0" * 40) == 0
+        assert corpus.count(b"F" * 40) == 0
+        # Between two neighbouring records
+        assert corpus.count(first[:-1] + bytes([first[-1] + 1])) == 0
+        assert corpus.count_password("not in the corpus") == 0
+    finally:
+        corpus.close()
+
+
+def test_truncated_file_finds_complete_records_only(tmp_path):
+    path = tmp_path / "corpus.txt"
+    lines = _write_corpus(path)
+    # Cut the last record in the middle of its hash
+    content = path.read_bytes()
+    path.write_bytes(content[: len(content) - len(lines[-1]) - 2 + 20])
+    corpus = BreachCorpus(path)
+    try:
+        assert corpus.count(lines[-1].split(":")[0].encode()) == 0
+        assert corpus.count(lines[-2].split(":")[0].encode()) == int(lines[-2].split(":")[1])
+        assert corpus.count(lines[0].split(":")[0].encode()) == int(lines[0].split(":")[1])
+    finally:
+        corpus.close()
+
+
+def test_record_without_a_count_counts_once(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_bytes(_sha1("a") + b":\n" + _sha1("b") + b":7\n")
+    corpus = BreachCorpus(path)
+    try:
+        assert corpus.count_password("a") == 1
+        assert corpus.count_password("b") == 7
+    finally:
+        corpus.close()
+
+
+def test_single_record_corpus(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_bytes(_sha1("only") + b":3")
+    corpus = BreachCorpus(path)
+    try:
+        assert corpus.count_password("only") == 3
+        assert corpus.count_password("other") == 0
+    finally:
+        corpus.close()
+
+
+def test_ntlm_hashes():
+    # Known NTLM hash of "password"
+    assert password_hash("password", "ntlm") == b"8846F7EAEE8FB117AD06BDD830B7586C"
+    assert _md4(b"abc").hex() == "a448017aaf21d8525fc10ae87aa6729d"
+
+
+def test_unusable_corpus_leaves_the_checker_unavailable(tmp_path):
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    for path in (empty, tmp_path / "missing.txt"):
+        checker = BreachChecker(str(path), "sha1", workers=1, batch_size=10)
+        checker.start()
+        assert not checker.available
+        checker.shutdown()
@@ -0,0 +1,39 @@
+def _create(client, headers):
+    response = client.post(
+        "/api/v1/passwords",
+        json={"title": "t", "email": "e", "password": "p"},
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_revalidating_someone_elses_entry_is_not_found(client, auth_headers):
+    password_id = _create(client, auth_headers)
+    etag = client.get(f"/api/v1/passwords/{password_id}", headers=auth_headers).headers["ETag"]
+    assert (
+        client.get(
+            f"/api/v1/passwords/{password_id}",
+            headers={**auth_headers, "If-None-Match": etag},
+        ).status_code
+        == 304
+    )
+
+    assert client.delete(f"/api/v1/passwords/{password_id}", headers=auth_headers).status_code == 204
+    response = client.get(
+        f"/api/v1/passwords/{password_id}", headers={**auth_headers, "If-None-Match": "*"}
+    )
+    assert response.status_code == 404
+
+
+def test_streamed_vault_etag_ignores_limit(client, auth_headers):
+    _create(client, auth_headers)
+    etags = {
+        client.post(
+            "/api/v1/passwords/get-all",
+            params={"stream": "true", **params},
+            headers=auth_headers,
+        ).headers["ETag"]
+        for params in ({}, {"limit": 1}, {"limit": 50})
+    }
+    assert len(etags) == 1
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from backend.core.export import InvalidArchive, read_export
+
+PASSPHRASE = "correct horse battery"
+ENTRIES = [
+    {"title": "Mail", "email": "me@example.com", "password": "s3cret"},
+    {
+        "title": "Bank",
+        "email": "me@example.com",
+        "username": "me",
+        "password": "päss \"quoted\"\nline",
+        "fa_code": "JBSWY3DPEHPK3PXP",
+    },
+]
+FIELDS = ("title", "email", "username", "password", "fa_code")
+
+
+def _vault(client, headers):
+    entries = client.post("/api/v1/passwords/get-all", headers=headers).json()
+    return sorted(
+        (tuple(entry.get(field) for field in FIELDS) for entry in entries), key=str
+    )
+
+
+def _export(client, headers) -> bytes:
+    response = client.get(
+        "/api/v1/passwords/export", headers={**headers, "X-Export-Passphrase": PASSPHRASE}
+    )
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+def test_export_then_import_restores_the_vault(client, auth_headers, other_auth_headers):
+    for entry in ENTRIES:
+        response = client.post("/api/v1/passwords", json=entry, headers=auth_headers)
+        assert response.status_code == 201, response.text
+
+    lines = list(read_export([_export(client, auth_headers)], PASSPHRASE))
+    assert len(lines) == len(ENTRIES)
+    response = client.post(
+        "/api/v1/passwords/import",
+        content=b"\n".join(lines),
+        headers={**other_auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["failed"] == 0
+
+    assert _vault(client, other_auth_headers) == _vault(client, auth_headers)
+
+
+def test_archive_needs_the_right_passphrase_and_every_byte(client, auth_headers):
+    client.post("/api/v1/passwords", json=ENTRIES[0], headers=auth_headers)
+    archive = _export(client, auth_headers)
+    assert [json.loads(line)["title"] for line in read_export([archive], PASSPHRASE)] == ["Mail"]
+
+    with pytest.raises(InvalidArchive):
+        list(read_export([archive], "wrong passphrase"))
+    with pytest.raises(InvalidArchive):
+        list(read_export([archive[:-1]], PASSPHRASE))
+    tampered = bytearray(archive)
+    tampered[-5] ^= 1
+    with pytest.raises(InvalidArchive):
+        list(read_export([bytes(tampered)], PASSPHRASE))
@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from backend.core.importers import read_json
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_bitwarden_login_without_username():
+    body = (FIXTURES / "bitwarden_null_username.json").read_bytes()
+    assert read_json(body) == [
+        {"title": "Example", "password": "hunter2", "email": ""},
+        {
+            "title": "Mail",
+            "username": "me@example.com",
+            "email": "me@example.com",
+            "password": "s3cret",
+        },
+    ]
+
+
+def test_bitwarden_export_imports_every_login(client, auth_headers):
+    response = client.post(
+        "/api/v1/passwords/import",
+        content=(FIXTURES / "bitwarden_null_username.json").read_bytes(),
+        headers={**auth_headers, "Content-Type": "application/json"},
+    )
+    assert response.status_code == 200, response.text
+    assert (response.json()["created"], response.json()["failed"]) == (2, 0)
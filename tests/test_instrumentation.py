@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from backend.core import metrics, profiling
+
+
+def _count(operation: str) -> int:
+    series = metrics.db_query_duration._series.get((operation,))
+    return series[-1] if series else 0
+
+
+def test_failed_statements_leave_no_timing_state_behind():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    profiling.instrument_engine(engine)
+    profile = profiling.RequestProfile()
+    token = profiling._current.set(profile)
+    try:
+        with engine.connect() as conn:
+            before = _count("SELECT")
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+
+            assert _count("SELECT") == before + 1
+            assert not conn.info
+            assert [count for count, _ in profile.queries.values()] == [1]
+            assert profile.queries["SELECT 1"][1] < 1
+    finally:
+        profiling._current.reset(token)
+        engine.dispose()
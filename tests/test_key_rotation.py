@@ -0,0 +1,55 @@
+import hashlib
+
+from sqlalchemy import text
+
+from backend.core import AsyncSessionLocal, security
+from backend.core.config import settings
+from backend.core.key_rotation import KeyRotationJob
+
+
+async def _rotate_with_one_undecryptable_row(password_id: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text("UPDATE passwords SET encrypted_password = 'garbage' WHERE id = :id"),
+            {"id": password_id},
+        )
+        await db.execute(text("DELETE FROM key_rotation_state"))
+        await db.commit()
+        total = (await db.execute(text("SELECT count(*) FROM passwords"))).scalar_one()
+    return total, await KeyRotationJob(batch_size=2, pause_ms=0).run()
+
+
+def test_rotation_skips_undecryptable_rows_and_counts_only_updates(client, auth_headers):
+    ids = [
+        client.post(
+            "/api/v1/passwords",
+            json={"title": f"t{i}", "email": "e", "password": "p"},
+            headers=auth_headers,
+        ).json()["id"]
+        for i in range(3)
+    ]
+
+    total, progress = client.portal.call(_rotate_with_one_undecryptable_row, ids[1])
+
+    assert progress.finished
+    assert progress.rotated == total - 1
+    response = client.get(f"/api/v1/passwords/{ids[2]}", headers=auth_headers)
+    assert response.json()["password"] == "p"
+
+
+async def _rotation_targets():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(text("SELECT key_fingerprint FROM key_rotation_state"))).scalars().all()
+
+
+def test_rotation_state_does_not_expose_a_hash_of_the_secret(client):
+    client.portal.call(KeyRotationJob(batch_size=100, pause_ms=0).run)
+    targets = client.portal.call(_rotation_targets)
+
+    secret = settings.SECRET_KEY.encode()
+    plain_hash = hashlib.sha256(
+        security.KDF_SALT + security.KDF_ITERATIONS.to_bytes(4, "big") + secret
+    ).hexdigest()
+    assert targets
+    assert not any(plain_hash in target for target in targets)
+    assert f"{security.current_key_id().hex()}:{settings.CIPHER}" in targets
@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "fa_code, expected",
+    [
+        (None, 201),
+        ("otpauth://totp/Example:me?secret=JBSWY3DPEHPK3PXP&issuer=Example", 201),
+        ("otpauth://totp/Example:me?issuer=Example", 400),
+        ("not a secret", 400),
+    ],
+)
+def test_create_validates_the_totp_secret(client, auth_headers, fa_code, expected):
+    response = client.post(
+        "/api/v1/passwords",
+        json={"title": "t", "email": "e", "password": "p", "fa_code": fa_code},
+        headers=auth_headers,
+    )
+    assert response.status_code == expected, response.text
+
+
+def test_update_rejects_an_invalid_totp_secret(client, auth_headers):
+    password_id = client.post(
+        "/api/v1/passwords",
+        json={"title": "t", "email": "e", "password": "p"},
+        headers=auth_headers,
+    ).json()["id"]
+    response = client.patch(
+        f"/api/v1/passwords/{password_id}", json={"fa_code": "not a secret"}, headers=auth_headers
+    )
+    assert response.status_code == 400, response.text
+
+
+def test_update_does_not_print_the_totp_secret(client, auth_headers, capsys):
+    password_id = client.post(
+        "/api/v1/passwords",
+        json={"title": "t", "email": "e", "password": "p"},
+        headers=auth_headers,
+    ).json()["id"]
+    secret = "otpauth://totp/Example:me?secret=JBSWY3DPEHPK3PXP"
+    response = client.patch(
+        f"/api/v1/passwords/{password_id}", json={"fa_code": secret}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert "JBSWY3DPEHPK3PXP" not in capsys.readouterr().out
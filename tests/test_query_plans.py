@@ -0,0 +1,139 @@
+"""Hot queries must stay on indexes: a full table scan or an unplanned
+temp B-tree sort fails the suite. Each CRUD call runs against the test
+database while its SELECTs are captured, then each is checked with
+``EXPLAIN QUERY PLAN``."""
+
+import pytest
+from sqlalchemy import event, text
+
+from backend.core import AsyncSessionLocal, engine
+from backend.core.fingerprints import STALE_FINGERPRINT
+from backend.core.security import encrypt_password
+from backend.crud import password as password_crud
+from backend.crud import user as user_crud
+from backend.models import Password, User
+
+
+def bad_plan_steps(plan: list[str]) -> list[str]:
+    def scans(step: str) -> bool:
+        if "VIRTUAL TABLE INDEX" in step:
+            # FTS5 marks a full-text lookup with M in its index string
+            return ":M" not in step
+        return step.startswith("SCAN ") and "CONSTANT ROW" not in step
+
+    return [step for step in plan if scans(step) or "USE TEMP B-TREE" in step]
+
+
+async def _seed() -> int:
+    async with AsyncSessionLocal() as db:
+        user = User(secret="plan-secret", email="plan@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        db.add_all(
+            Password(
+                user_id=user.id,
+                title=f"t{i}",
+                email="e",
+                encrypted_password=encrypt_password("p"),
+                fa_code="JBSWY3DPEHPK3PXP" if i % 2 else None,
+            )
+            for i in range(20)
+        )
+        await db.flush()
+        # Mirror them into the search index, as the create paths do
+        await db.execute(
+            text(
+                "INSERT INTO passwords_fts (rowid, title, email, username, user_id) "
+                "SELECT id, title, email, '', user_id FROM passwords WHERE user_id = :user_id"
+            ),
+            {"user_id": user.id},
+        )
+        await db.commit()
+
+
+async def _fingerprint_backfill_select(db, user_id):
+    # The batch query of FingerprintBackfillJob._backfill_batch
+    await db.execute(
+        text(
+            "SELECT id, user_id, encrypted_password FROM passwords "
+            f"WHERE id > :last_id AND {STALE_FINGERPRINT} ORDER BY id LIMIT :limit"
+        ),
+        {"last_id": 0, "key_id": b"\0\0\0\0", "limit": 100},
+    )
+
+
+async def _stream(db, user_id):
+    async for _ in password_crud.stream_user_passwords(db, user_id, after_id=3):
+        pass
+
+
+# name -> CRUD call that issues the query
+QUERIES = {
+    "get_user": lambda db, uid: user_crud.get_user(db, uid),
+    "get_user_by_email": lambda db, uid: user_crud.get_user_by_email(db, "plan@example.com"),
+    "get_user_by_secret": lambda db, uid: user_crud.get_user_by_secret(db, "plan-secret"),
+    "get_password": lambda db, uid: password_crud.get_password(db, 1),
+    "get_user_passwords": lambda db, uid: password_crud.get_user_passwords(db, uid),
+    "get_user_passwords_page": lambda db, uid: password_crud.get_user_passwords(
+        db, uid, limit=5, after_id=3
+    ),
+    "stream_user_passwords": _stream,
+    "get_reused_passwords": lambda db, uid: password_crud.get_reused_passwords(
+        db, uid, b"\0\0\0\0"
+    ),
+    "get_changes": lambda db, uid: password_crud.get_changes(
+        db, uid, since=0, after_id=None, limit=10
+    ),
+    "get_changes_after": lambda db, uid: password_crud.get_changes(
+        db, uid, since=3, after_id=4, limit=10
+    ),
+    "search_passwords": lambda db, uid: password_crud.search_passwords(db, uid, "t1"),
+    "get_user_totp_entries": lambda db, uid: password_crud.get_user_totp_entries(db, uid),
+    "get_totp_entries_for_users": lambda db, uid: password_crud.get_totp_entries_for_users(
+        db, [uid, uid + 1]
+    ),
+    "fingerprint_backfill": _fingerprint_backfill_select,
+}
+
+
+async def _plans(name: str) -> list[tuple[str, list[str]]]:
+    call = QUERIES[name]
+    captured: dict[str, tuple] = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")) and not executemany:
+            captured.setdefault(statement, parameters)
+
+    async with AsyncSessionLocal() as db:
+        user_id = (
+            await db.execute(text("SELECT id FROM users WHERE email = 'plan@example.com'"))
+        ).scalar()
+        # Only this session's connection: background jobs run queries too
+        connection = (await db.connection()).sync_connection
+        event.listen(connection, "before_cursor_execute", capture)
+        try:
+            await call(db, user_id)
+        finally:
+            event.remove(connection, "before_cursor_execute", capture)
+
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in captured.items():
+            result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+            plans.append((statement, [row[3] for row in result]))
+    return plans
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    client.portal.call(_seed)
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_query_uses_indexes(client, seeded, name):
+    plans = client.portal.call(_plans, name)
+    assert plans, "no SELECT was captured"
+    failures = [
+        (" ".join(statement.split()), plan) for statement, plan in plans if bad_plan_steps(plan)
+    ]
+    assert not failures
@@ -0,0 +1,62 @@
+import pytest
+
+from backend.crud.password import build_match_query
+
+
+def _create(client, headers, **fields):
+    entry = {"email": "e", "password": "p", **fields}
+    response = client.post("/api/v1/passwords", json=entry, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _search(client, headers, q):
+    response = client.get("/api/v1/passwords/search", params={"q": q}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [entry["title"] for entry in response.json()]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("git", '"git"*'),
+        ("  git   hub ", '"git"* "hub"*'),
+        ('say "hi"', '"say"* """hi"""*'),
+        ('"', None),
+        ("   ", None),
+        ("title:x OR y*", '"title:x"* "OR"* "y*"*'),
+    ],
+)
+def test_match_query_quotes_every_term(query, expected):
+    assert build_match_query(query) == expected
+
+
+def test_search_matches_prefixes_of_every_term(client, auth_headers):
+    _create(client, auth_headers, title="GitHub", username="octocat")
+    _create(client, auth_headers, title="GitLab", email="lab@example.com")
+    _create(client, auth_headers, title="Bank")
+
+    assert sorted(_search(client, auth_headers, "git")) == ["GitHub", "GitLab"]
+    assert _search(client, auth_headers, "git octo") == ["GitHub"]
+    assert _search(client, auth_headers, "lab@example") == ["GitLab"]
+
+
+@pytest.mark.parametrize(
+    "q",
+    ['"', '""', "'", "*", "(", ")", "a OR", "NOT", "NEAR(a b)", "title:", "^x", "-x", "a AND OR"],
+)
+def test_fts_syntax_in_the_query_is_taken_literally(client, auth_headers, q):
+    _create(client, auth_headers, title="plain")
+    assert _search(client, auth_headers, q) == []
+
+
+def test_query_syntax_matches_literal_titles(client, auth_headers):
+    _create(client, auth_headers, title='say "hi"')
+    _create(client, auth_headers, title="hi there")
+
+    assert _search(client, auth_headers, 'say "hi"') == ['say "hi"']
+
+
+def test_search_stays_within_the_users_vault(client, auth_headers, other_auth_headers):
+    _create(client, other_auth_headers, title="Secret project")
+    assert _search(client, auth_headers, "secret") == []
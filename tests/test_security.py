@@ -0,0 +1,52 @@
+import hashlib
+import json
+
+from backend.core import security
+from backend.core.config import settings
+
+
+def _secret_hashes(secret: str) -> set[str]:
+    """Cheap functions of a secret that would let it be guessed offline"""
+    stretched = security.KDF_SALT + security.KDF_ITERATIONS.to_bytes(4, "big") + secret.encode()
+    return {
+        hashlib.sha256(stretched).hexdigest(),
+        hashlib.sha256(secret.encode()).hexdigest(),
+    }
+
+
+def test_key_file_holds_no_plain_hash_of_the_secret(tmp_path, monkeypatch):
+    path = tmp_path / "keys.json"
+    monkeypatch.setattr(settings, "FERNET_KEY_FILE", str(path))
+    keys = security._load_fernet_keys(["first secret", "second secret"])
+
+    content = path.read_text()
+    assert json.loads(content) == {"keys": [key.decode() for key in keys]}
+    for secret in ("first secret", "second secret"):
+        assert not any(digest in content for digest in _secret_hashes(secret))
+
+
+def test_stale_key_file_is_replaced(tmp_path, monkeypatch):
+    path = tmp_path / "keys.json"
+    monkeypatch.setattr(settings, "FERNET_KEY_FILE", str(path))
+    monkeypatch.setattr(security, "_keyring", None)
+    stale = security._load_fernet_keys(["old secret"])
+
+    monkeypatch.setattr(security.threading, "Thread", _RunNow)
+    assert security._load_fernet_keys(["new secret"]) == stale
+    assert security._read_key_file(str(path)) == [security.get_fernet_key("new secret")]
+    # The running keyring switched over, keeping the stale key readable
+    from cryptography.fernet import Fernet
+
+    keyring = security._keyring
+    assert Fernet(security.get_fernet_key("new secret")).decrypt(keyring.fernet.encrypt(b"x"))
+    assert keyring.fernet.decrypt(Fernet(stale[0]).encrypt(b"x")) == b"x"
+
+
+class _RunNow:
+    """Stands in for threading.Thread: runs the target on start()"""
+
+    def __init__(self, target, args, **kwargs):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
@@ -0,0 +1,46 @@
+def _create(client, headers, title):
+    response = client.post(
+        "/api/v1/passwords",
+        json={"title": title, "email": "e", "password": "p"},
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_deleted_id_is_not_reused_by_a_later_create(client, auth_headers):
+    _create(client, auth_headers, "A")
+    deleted_id = _create(client, auth_headers, "B")
+    cursor = client.get("/api/v1/passwords/changes", headers=auth_headers).json()["cursor"]
+
+    assert client.delete(f"/api/v1/passwords/{deleted_id}", headers=auth_headers).status_code == 204
+    new_id = _create(client, auth_headers, "New")
+    assert new_id != deleted_id
+
+    changes = client.get(
+        "/api/v1/passwords/changes", params={"since": cursor}, headers=auth_headers
+    ).json()
+    assert [(entry["id"], entry["title"]) for entry in changes["changed"]] == [(new_id, "New")]
+    assert changes["deleted"] == [deleted_id]
+
+
+def test_changes_pages_through_one_large_write(client, auth_headers):
+    cursor = client.get("/api/v1/passwords/changes", headers=auth_headers).json()["cursor"]
+    operations = [
+        {"op": "create", "data": {"title": f"t{i}", "email": "e", "password": "p"}}
+        for i in range(5)
+    ]
+    client.post("/api/v1/passwords/batch", json={"operations": operations}, headers=auth_headers)
+
+    titles = []
+    while True:
+        page = client.get(
+            "/api/v1/passwords/changes",
+            params={"since": cursor, "limit": 2},
+            headers=auth_headers,
+        ).json()
+        titles += [entry["title"] for entry in page["changed"]]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert titles == [f"t{i}" for i in range(5)]
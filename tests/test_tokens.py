@@ -0,0 +1,86 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from backend.core import tokens
+from backend.core.config import settings
+from backend.core.tokens import (
+    DenylistSync,
+    InvalidToken,
+    TokenDenylist,
+    create_access_token,
+    decode_access_token,
+)
+
+
+def _encode(part: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+
+
+def _signed(header: dict, payload: dict, key: str) -> str:
+    signing_input = f"{_encode(header)}.{_encode(payload)}"
+    digest = hmac.new(key.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return signing_input + "." + base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def test_token_round_trip():
+    payload = decode_access_token(create_access_token(42))
+    assert payload["sub"] == "42"
+    assert payload["exp"] > payload["iat"]
+
+
+def test_tampered_payload_is_rejected():
+    header, _, signature = create_access_token(42).split(".")
+    forged = _encode({"sub": "1", "iat": 0, "exp": 2**31, "jti": "x"})
+    with pytest.raises(InvalidToken, match="Bad signature"):
+        decode_access_token(f"{header}.{forged}.{signature}")
+
+
+def test_token_signed_with_another_key_is_rejected():
+    payload = {"sub": "1", "iat": 0, "exp": 2**31, "jti": "x"}
+    with pytest.raises(InvalidToken, match="Bad signature"):
+        decode_access_token(_signed({"alg": "HS256", "typ": "JWT"}, payload, "not the key"))
+
+
+def test_unsigned_token_is_rejected():
+    payload = {"sub": "1", "iat": 0, "exp": 2**31, "jti": "x"}
+    unsigned = f"{_encode({'alg': 'none', 'typ': 'JWT'})}.{_encode(payload)}."
+    with pytest.raises(InvalidToken):
+        decode_access_token(unsigned)
+
+
+def test_other_algorithm_is_rejected_even_when_signed():
+    payload = {"sub": "1", "iat": 0, "exp": 2**31, "jti": "x"}
+    token = _signed({"alg": "HS512", "typ": "JWT"}, payload, settings.SECRET_KEY)
+    with pytest.raises(InvalidToken, match="Unexpected algorithm"):
+        decode_access_token(token)
+
+
+@pytest.mark.parametrize("token", ["", "a.b", "a.b.c.d", "not-a-token"])
+def test_malformed_token_is_rejected(token):
+    with pytest.raises(InvalidToken):
+        decode_access_token(token)
+
+
+def test_expired_token_is_rejected(client):
+    token = create_access_token(42, expires_in=-1)
+    with pytest.raises(InvalidToken, match="expired"):
+        decode_access_token(token)
+    response = client.get(
+        "/api/v1/passwords/changes", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 401
+
+
+def test_logout_on_one_worker_rejects_the_token_on_another(client, auth_headers, monkeypatch):
+    assert client.post("/api/v1/auth/logout", headers=auth_headers).status_code == 204
+
+    # Another worker process starts with its own, empty denylist
+    monkeypatch.setattr(tokens, "denylist", TokenDenylist())
+    assert client.get("/api/v1/passwords/changes", headers=auth_headers).status_code == 200
+
+    client.portal.call(DenylistSync(interval=1).refresh)
+    assert client.get("/api/v1/passwords/changes", headers=auth_headers).status_code == 401
@@ -0,0 +1,31 @@
+import asyncio
+
+from backend.core import profiling
+from backend.core.totp_stream import TotpBroadcaster
+
+
+async def _profiles_seen_by_ticks():
+    seen = []
+
+    async def load_entries(user_ids):
+        seen.append(profiling._current.get())
+        return {}
+
+    broadcaster = TotpBroadcaster(max_subscribers=10, period=1, load_entries=load_entries)
+    # Subscribe from inside a profiled request, as the stream route does
+    token = profiling._current.set(profiling.RequestProfile())
+    try:
+        subscription = broadcaster.subscribe(1)
+    finally:
+        profiling._current.reset(token)
+    try:
+        await asyncio.wait_for(subscription.get(), timeout=3)
+    finally:
+        await broadcaster.shutdown()
+    return seen
+
+
+def test_ticker_does_not_run_in_the_first_subscribers_request_context():
+    seen = asyncio.run(_profiles_seen_by_ticks())
+
+    assert seen and all(profile is None for profile in seen)
@@ -0,0 +1,57 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from backend.core import AsyncSessionLocal
+from backend.core.write_batcher import WriteBatcher
+
+
+def _insert(value, calls):
+    async def op(session):
+        calls.append(value)
+        await session.execute(
+            text("INSERT INTO batcher_test (value) VALUES (:value)"), {"value": value}
+        )
+        return value
+
+    return op
+
+
+async def _batch_with_a_bad_write():
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS batcher_test "
+                "(id INTEGER PRIMARY KEY, value TEXT NOT NULL)"
+            )
+        )
+        await db.commit()
+
+    batcher = WriteBatcher(max_size=10, max_wait_ms=50)
+    calls = []
+    try:
+        results = await asyncio.gather(
+            batcher.submit(_insert("a", calls)),
+            batcher.submit(_insert(None, calls)),
+            batcher.submit(_insert("b", calls)),
+            return_exceptions=True,
+        )
+    finally:
+        await batcher.shutdown()
+
+    async with AsyncSessionLocal() as db:
+        stored = (
+            await db.execute(text("SELECT value FROM batcher_test ORDER BY id"))
+        ).scalars().all()
+    return results, calls, stored
+
+
+def test_failed_group_commit_replays_writes_one_by_one(client):
+    results, calls, stored = client.portal.call(_batch_with_a_bad_write)
+
+    assert results[0] == "a" and results[2] == "b"
+    assert isinstance(results[1], IntegrityError)
+    # Tried together once, then each on its own
+    assert calls == ["a", None, "a", None, "b"]
+    assert stored == ["a", "b"]